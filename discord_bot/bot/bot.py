@@ -8,7 +8,11 @@ from loguru import logger
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = commands.Bot(
+    command_prefix="!",
+    intents=intents,
+    max_ratelimit_timeout=config.DISCORD_MAX_RATELIMIT_TIMEOUT,
+)
 
 
 @bot.event
@@ -43,7 +47,9 @@ async def start_bot():
 
     for attempt in range(max_retries):
         try:
-            logger.info(f"Starting Discord bot (attempt {attempt + 1}/{max_retries})...")
+            logger.info(
+                f"Starting Discord bot (attempt {attempt + 1}/{max_retries})..."
+            )
             await bot.start(config.DISCORD_TOKEN)
         except discord.errors.ConnectionClosed as e:
             logger.warning(f"Connection closed: {e}. Reconnecting in {retry_delay}s...")
@@ -62,4 +68,3 @@ async def start_bot():
             else:
                 logger.error("Max retries reached. Bot startup failed.")
                 raise
-
@@ -3,10 +3,10 @@ import game_logic
 from discord import app_commands
 from discord.ui import Button, View
 from loguru import logger
-from user_sessions import get_user_room, set_user_room
+from user_sessions import get_user_room, invalidate_user_room, set_user_room
 
 from bot.bot import bot
-from bot.utils import format_player_list
+from bot.utils import build_status_embed
 
 
 class GameControlView(View):
@@ -59,7 +59,7 @@ class GameControlView(View):
 
             await set_user_room(user_id, self.room_id)
 
-            bot.firestore_listener.start_room_listener(self.room_id)
+            await bot.firestore_listener.start_room_listener(self.room_id)
             logger.info(
                 f"User {username} ({user_id}) joined room {self.room_id} via button"
             )
@@ -89,6 +89,8 @@ class GameControlView(View):
         user_id = str(interaction.user.id)
 
         try:
+            # Re-track the room in case its listener was evicted while idle
+            await bot.firestore_listener.start_room_listener(self.room_id)
             await game_logic.restart_game(self.room_id, user_id)
 
             logger.info(f"Game started for room {self.room_id} via button by {user_id}")
@@ -107,7 +109,7 @@ class GameControlView(View):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            room_status = await game_logic.get_room_status(self.room_id)
+            room_status = await bot.firestore_listener.get_room_status(self.room_id)
 
             if not room_status:
                 await interaction.followup.send(
@@ -115,44 +117,7 @@ class GameControlView(View):
                 )
                 return
 
-            status_emoji = {
-                "lobby": "⏳",
-                "dealt": "🎮",
-                "playing": "🎭",
-                "ended": "🏁",
-            }
-
-            status_text = {
-                "lobby": "Poczekalnia",
-                "dealt": "Ujawnianie słów",
-                "playing": "Gra w toku",
-                "ended": "Zakończona",
-            }
-
-            embed = discord.Embed(
-                title=f"Status pokoju {self.room_id}", color=discord.Color.blue()
-            )
-            embed.add_field(
-                name="Status",
-                value=f"{status_emoji.get(room_status['status'], '❓')} {status_text.get(room_status['status'], 'Nieznany')}",
-                inline=True,
-            )
-            embed.add_field(
-                name="Gracze",
-                value=f"{len(room_status['players'])} graczy",
-                inline=True,
-            )
-            embed.add_field(
-                name="Dołączanie",
-                value="🟢 Otwarte" if room_status.get("allowJoin") else "🔴 Zamknięte",
-                inline=True,
-            )
-            embed.add_field(
-                name="Lista graczy",
-                value=format_player_list(room_status["players"]),
-                inline=False,
-            )
-
+            embed = build_status_embed(room_status)
             await interaction.followup.send(embed=embed, ephemeral=True)
 
         except Exception as e:
@@ -179,7 +144,7 @@ async def create_command(interaction: discord.Interaction):
 
         await set_user_room(user_id, room_id)
 
-        bot.firestore_listener.start_room_listener(room_id)
+        await bot.firestore_listener.start_room_listener(room_id)
         logger.info(f"Started listener for room {room_id}")
 
         embed = discord.Embed(
@@ -216,7 +181,7 @@ async def join_command(interaction: discord.Interaction, code: str):
 
         await set_user_room(user_id, code)
 
-        bot.firestore_listener.start_room_listener(code)
+        await bot.firestore_listener.start_room_listener(code)
         logger.info(f"Started listener for room {code}")
 
         embed = discord.Embed(
@@ -247,6 +212,7 @@ async def start_command(interaction: discord.Interaction, code: str | None = Non
     await interaction.response.defer()
 
     user_id = str(interaction.user.id)
+    remembered = not code
 
     try:
         if not code:
@@ -261,10 +227,15 @@ async def start_command(interaction: discord.Interaction, code: str | None = Non
         else:
             code = code.upper().strip()
 
+        # Re-track the room in case its listener was evicted while idle
+        await bot.firestore_listener.start_room_listener(code)
         await game_logic.restart_game(code, user_id)
         logger.info(f"Game started for room {code}, Cloud Function will handle secrets")
 
     except ValueError as e:
+        if remembered:
+            # The remembered room may have been cleaned up, re-read it next time
+            invalidate_user_room(user_id)
         await interaction.followup.send(f"❌ {str(e)}", ephemeral=True)
     except Exception as e:
         logger.error(f"Error in start command: {e}")
@@ -277,6 +248,7 @@ async def status_command(interaction: discord.Interaction, code: str | None = No
     await interaction.response.defer()
 
     user_id = str(interaction.user.id)
+    remembered = not code
 
     try:
         if not code:
@@ -291,50 +263,17 @@ async def status_command(interaction: discord.Interaction, code: str | None = No
         else:
             code = code.upper().strip()
 
-        room_status = await game_logic.get_room_status(code)
+        room_status = await bot.firestore_listener.get_room_status(code)
 
         if not room_status:
+            if remembered:
+                invalidate_user_room(user_id)
             await interaction.followup.send(
                 f"❌ Pokój {code} nie istnieje!", ephemeral=True
             )
             return
 
-        status_emoji = {
-            "lobby": "⏳",
-            "dealt": "🎮",
-            "playing": "🎭",
-            "ended": "🏁",
-        }
-
-        status_text = {
-            "lobby": "Poczekalnia",
-            "dealt": "Ujawnianie słów",
-            "playing": "Gra w toku",
-            "ended": "Zakończona",
-        }
-
-        embed = discord.Embed(title=f"Status pokoju {code}", color=discord.Color.blue())
-        embed.add_field(
-            name="Status",
-            value=f"{status_emoji.get(room_status['status'], '❓')} {status_text.get(room_status['status'], 'Nieznany')}",
-            inline=True,
-        )
-        embed.add_field(
-            name="Gracze",
-            value=f"{len(room_status['players'])} graczy",
-            inline=True,
-        )
-        embed.add_field(
-            name="Dołączanie",
-            value="🟢 Otwarte" if room_status.get("allowJoin") else "🔴 Zamknięte",
-            inline=True,
-        )
-        embed.add_field(
-            name="Lista graczy",
-            value=format_player_list(room_status["players"]),
-            inline=False,
-        )
-
+        embed = build_status_embed(room_status)
         await interaction.followup.send(embed=embed)
 
     except Exception as e:
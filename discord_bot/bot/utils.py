@@ -1,82 +1,88 @@
 import discord
-from loguru import logger
 
+STATUS_EMOJI = {
+    "lobby": "⏳",
+    "dealt": "🎮",
+    "playing": "🎭",
+    "ended": "🏁",
+}
 
-async def send_word_dm(
-    user: discord.User,
+STATUS_TEXT = {
+    "lobby": "Poczekalnia",
+    "dealt": "Ujawnianie słów",
+    "playing": "Gra w toku",
+    "ended": "Zakończona",
+}
+
+# room_id -> (state version, rendered status embed)
+_status_embed_cache = {}
+
+
+def build_word_dm_embed(
     room_id: str,
     secret: dict,
     room_data: dict | None = None,
     all_players: dict | None = None,
-):
-    try:
-        if secret["role"] == "impostor":
-            embed = discord.Embed(
-                title="🎭 Jesteś IMPOSTOREM!",
-                description=(
-                    "Inni gracze widzą słowo. Ty musisz udawać, że je znasz!\n"
-                    "Spróbuj odkryć, co to za słowo, obserwując innych graczy."
-                ),
-                color=discord.Color.purple(),
-            )
-
-            # Add hints if available
-            hints = secret.get("hints", [])
-            if hints:
-                hints_text = "\n".join([f"• {hint}" for hint in hints])
-                embed.add_field(name="💡 Podpowiedzi", value=hints_text, inline=False)
-        else:
-            embed = discord.Embed(
-                title="📝 Twoje słowo",
-                description=f"**{secret['word']}**",
-                color=discord.Color.green(),
-            )
-            embed.add_field(
-                name="Pamiętaj!",
-                value="Zapamiętaj to słowo i nie pokazuj go innym!",
-                inline=False,
-            )
-
-        # Add speaking order if available
-        if room_data and all_players and room_data.get("speakingOrder"):
-            speaking_order = room_data["speakingOrder"]
-            discord_user_id = secret.get("discordId")
-
-            order_lines = []
-            position = 1
-            for player_id in speaking_order:
-                player = all_players.get(player_id, {})
-                player_name = player.get("name", "Nieznany gracz") or "Nieznany gracz"
-
-                # Skip players with missing or invalid data
-                if not player or not player_name.strip():
-                    continue
-
-                # Check if this is the current user
-                if player_id == discord_user_id:
-                    order_lines.append(f"**{position}.** {player_name} **(TY)**")
-                else:
-                    order_lines.append(f"{position}. {player_name}")
-
-                position += 1
-
-            order_text = "\n".join(order_lines)
-            embed.add_field(
-                name="🎤 Kolejność wypowiedzi", value=order_text, inline=False
-            )
-
-        embed.add_field(name="Kod pokoju", value=f"`{room_id}`", inline=False)
-        embed.set_footer(
-            text="Możesz użyć /impostor reveal aby zobaczyć swoje słowo ponownie"
+) -> discord.Embed:
+    if secret["role"] == "impostor":
+        embed = discord.Embed(
+            title="🎭 Jesteś IMPOSTOREM!",
+            description=(
+                "Inni gracze widzą słowo. Ty musisz udawać, że je znasz!\n"
+                "Spróbuj odkryć, co to za słowo, obserwując innych graczy."
+            ),
+            color=discord.Color.purple(),
+        )
+
+        # Add hints if available
+        hints = secret.get("hints", [])
+        if hints:
+            hints_text = "\n".join([f"• {hint}" for hint in hints])
+            embed.add_field(name="💡 Podpowiedzi", value=hints_text, inline=False)
+    else:
+        embed = discord.Embed(
+            title="📝 Twoje słowo",
+            description=f"**{secret['word']}**",
+            color=discord.Color.green(),
+        )
+        embed.add_field(
+            name="Pamiętaj!",
+            value="Zapamiętaj to słowo i nie pokazuj go innym!",
+            inline=False,
         )
 
-        await user.send(embed=embed)
-        return True
-    except discord.Forbidden:
-        return False
-    except Exception as e:
-        logger.error(f"Error sending DM to {user.name}: {e}")
-        return False
+    # Add speaking order if available
+    if room_data and all_players and room_data.get("speakingOrder"):
+        speaking_order = room_data["speakingOrder"]
+        discord_user_id = secret.get("discordId")
+
+        order_lines = []
+        position = 1
+        for player_id in speaking_order:
+            player = all_players.get(player_id, {})
+            player_name = player.get("name", "Nieznany gracz") or "Nieznany gracz"
+
+            # Skip players with missing or invalid data
+            if not player or not player_name.strip():
+                continue
+
+            # Check if this is the current user
+            if player_id == discord_user_id:
+                order_lines.append(f"**{position}.** {player_name} **(TY)**")
+            else:
+                order_lines.append(f"{position}. {player_name}")
+
+            position += 1
+
+        order_text = "\n".join(order_lines)
+        embed.add_field(name="🎤 Kolejność wypowiedzi", value=order_text, inline=False)
+
+    embed.add_field(name="Kod pokoju", value=f"`{room_id}`", inline=False)
+    embed.set_footer(
+        text="Możesz użyć /impostor reveal aby zobaczyć swoje słowo ponownie"
+    )
+
+    return embed
 
 
 def format_player_list(players: list) -> str:
@@ -91,3 +97,58 @@ def format_player_list(players: list) -> str:
         lines.append(f"{i}. {player['name']} {status} {source} {seen}")
 
     return "\n".join(lines)
+
+
+def build_status_embed(room_status: dict) -> discord.Embed:
+    """
+    Render the room status embed, memoized per room state version
+
+    Parameters
+    ----------
+    room_status : dict
+        Room status as returned by ``FirestoreListener.get_room_status``;
+        statuses carrying a ``version`` (live room state) are memoized until
+        the room state changes
+
+    Returns
+    -------
+    discord.Embed
+        Status embed, shared between callers and not to be modified
+    """
+    room_id = room_status["room_id"]
+    version = room_status.get("version")
+    cached = _status_embed_cache.get(room_id)
+    if version is not None and cached and cached[0] == version:
+        return cached[1]
+
+    status = room_status["status"]
+    embed = discord.Embed(title=f"Status pokoju {room_id}", color=discord.Color.blue())
+    embed.add_field(
+        name="Status",
+        value=f"{STATUS_EMOJI.get(status, '❓')} {STATUS_TEXT.get(status, 'Nieznany')}",
+        inline=True,
+    )
+    embed.add_field(
+        name="Gracze",
+        value=f"{len(room_status['players'])} graczy",
+        inline=True,
+    )
+    embed.add_field(
+        name="Dołączanie",
+        value="🟢 Otwarte" if room_status.get("allowJoin") else "🔴 Zamknięte",
+        inline=True,
+    )
+    embed.add_field(
+        name="Lista graczy",
+        value=format_player_list(room_status["players"]),
+        inline=False,
+    )
+
+    if version is not None:
+        _status_embed_cache[room_id] = (version, embed)
+    return embed
+
+
+def forget_status_embed(room_id: str):
+    """Drop a room's memoized status embed"""
+    _status_embed_cache.pop(room_id, None)
@@ -9,6 +9,49 @@ class Config:
     DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
     FIREBASE_SERVICE_ACCOUNT = os.getenv("FIREBASE_SERVICE_ACCOUNT")
 
+    # Size of the thread pool that runs blocking Firestore calls
+    FIRESTORE_MAX_WORKERS = int(os.getenv("FIRESTORE_MAX_WORKERS", "16"))
+
+    # "collection_group" keeps one secrets watch for all rooms,
+    # "per_room" opens a watch per room
+    LISTENER_MODE = os.getenv("LISTENER_MODE", "collection_group")
+
+    # Listener eviction policy
+    LISTENER_IDLE_TTL_SECONDS = int(os.getenv("LISTENER_IDLE_TTL_SECONDS", "7200"))
+    LISTENER_MAX_ACTIVE = int(os.getenv("LISTENER_MAX_ACTIVE", "500"))
+    LISTENER_ROOM_MAX_AGE_HOURS = int(os.getenv("LISTENER_ROOM_MAX_AGE_HOURS", "24"))
+    LISTENER_SWEEP_INTERVAL_SECONDS = int(
+        os.getenv("LISTENER_SWEEP_INTERVAL_SECONDS", "300")
+    )
+
+    # Room state watches opened by status lookups
+    ROOM_STATE_IDLE_TTL_SECONDS = int(os.getenv("ROOM_STATE_IDLE_TTL_SECONDS", "900"))
+    ROOM_STATE_MAX_WATCHED = int(os.getenv("ROOM_STATE_MAX_WATCHED", "100"))
+    # How long a first lookup waits for the watch's snapshots before reading
+    ROOM_STATE_LOAD_TIMEOUT_SECONDS = float(
+        os.getenv("ROOM_STATE_LOAD_TIMEOUT_SECONDS", "5")
+    )
+
+    # DM dispatcher: worker pool size, per-channel and global rate limits, retries
+    DM_WORKERS = int(os.getenv("DM_WORKERS", "4"))
+    DM_RATE_PER_SECOND = float(os.getenv("DM_RATE_PER_SECOND", "5"))
+    DM_BURST = int(os.getenv("DM_BURST", "5"))
+    DM_GLOBAL_RATE_PER_SECOND = float(os.getenv("DM_GLOBAL_RATE_PER_SECOND", "40"))
+    DM_MAX_RETRIES = int(os.getenv("DM_MAX_RETRIES", "3"))
+
+    # Rate limits longer than this raise RateLimited instead of sleeping
+    # inside discord.py (30 is the smallest value discord.py accepts)
+    DISCORD_MAX_RATELIMIT_TIMEOUT = float(
+        os.getenv("DISCORD_MAX_RATELIMIT_TIMEOUT", "30")
+    )
+
+    # In-process cache of discord_user_sessions lookups
+    SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "600"))
+    SESSION_CACHE_MAX_SIZE = int(os.getenv("SESSION_CACHE_MAX_SIZE", "10000"))
+
+    # Longest a delivered DM waits before its seen flag is written
+    SEEN_FLUSH_WINDOW_SECONDS = float(os.getenv("SEEN_FLUSH_WINDOW_SECONDS", "2"))
+
     @classmethod
     def validate(cls):
         if not cls.DISCORD_TOKEN:
@@ -20,4 +63,3 @@ class Config:
 
 
 config = Config()
-
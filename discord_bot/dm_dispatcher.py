@@ -0,0 +1,227 @@
+"""
+DM dispatcher for Discord bot
+Delivers game deal DMs through a bounded worker pool, rate limited per
+route and channel/user like Discord's buckets, under one global limit
+"""
+
+import asyncio
+import random
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+import discord
+from config import config
+from loguru import logger
+
+FETCH_USER_ROUTE = "GET /users/{user_id}"
+CREATE_DM_ROUTE = "POST /users/@me/channels"
+SEND_DM_ROUTE = "POST /channels/{channel_id}/messages"
+
+# Idle buckets are dropped once this many are held
+MAX_BUCKETS = 1024
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, up to ``capacity`` stored"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def is_idle(self) -> bool:
+        """True when refilled and unused, i.e. no different from a new bucket"""
+        refilled = self.tokens + (time.monotonic() - self.updated_at) * self.rate
+        return refilled >= self.capacity and not self._lock.locked()
+
+
+class DMDispatcher:
+    """Sends DMs from a queue with bounded concurrency, rate limits and retries"""
+
+    def __init__(self, bot: discord.Client):
+        self.bot = bot
+        self.queue = asyncio.Queue()
+        self.workers = []
+        # (route, channel or user ID) -> bucket, least recently used first
+        self.buckets = OrderedDict()
+        self.global_bucket = TokenBucket(
+            config.DM_GLOBAL_RATE_PER_SECOND, int(config.DM_GLOBAL_RATE_PER_SECOND)
+        )
+
+        self.stats = {
+            "sent": 0,
+            "failed": 0,
+            "retries": 0,
+            "userCacheHits": 0,
+            "userFetches": 0,
+            "dmChannelOpens": 0,
+        }
+        # Recent secret-creation -> DM-delivery latencies in seconds
+        self.latencies = deque(maxlen=1000)
+
+    def _ensure_workers(self):
+        if self.workers:
+            return
+        self.workers = [
+            asyncio.create_task(self._worker()) for _ in range(config.DM_WORKERS)
+        ]
+        logger.info(f"Started {len(self.workers)} DM dispatcher worker(s)")
+
+    async def send(
+        self, discord_id: str, embed: discord.Embed, created_at: datetime | None = None
+    ) -> bool:
+        """
+        Queue a DM and wait for its delivery
+
+        Parameters
+        ----------
+        discord_id : str
+            Discord user ID to DM
+        embed : discord.Embed
+            Message to send
+        created_at : datetime | None
+            When the secret was created, used for end-to-end latency
+
+        Returns
+        -------
+        bool
+            True if the DM was delivered
+        """
+        self._ensure_workers()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((discord_id, embed, created_at, future))
+        return await future
+
+    async def _worker(self):
+        while True:
+            discord_id, embed, created_at, future = await self.queue.get()
+            try:
+                delivered = await self._deliver(discord_id, embed)
+                if delivered and created_at:
+                    self.latencies.append(
+                        (datetime.now(timezone.utc) - created_at).total_seconds()
+                    )
+                if not future.done():
+                    future.set_result(delivered)
+            except Exception as e:
+                logger.error(f"Error dispatching DM to {discord_id}: {e}")
+                if not future.done():
+                    future.set_result(False)
+            finally:
+                self.queue.task_done()
+
+    async def _resolve_user(self, user_id: int) -> discord.User | None:
+        """Get a user from the bot cache, falling back to a REST fetch"""
+        user = self.bot.get_user(user_id)
+        if user:
+            self.stats["userCacheHits"] += 1
+            return user
+
+        self.stats["userFetches"] += 1
+        return await self._with_retries(
+            FETCH_USER_ROUTE, user_id, lambda: self.bot.fetch_user(user_id)
+        )
+
+    async def _deliver(self, discord_id: str, embed: discord.Embed) -> bool:
+        try:
+            user = await self._resolve_user(int(discord_id))
+            if not user:
+                logger.error(f"Could not find Discord user with ID {discord_id}")
+                self.stats["failed"] += 1
+                return False
+
+            # user.send would open the DM channel outside of any bucket
+            channel = user.dm_channel
+            if channel is None:
+                self.stats["dmChannelOpens"] += 1
+                channel = await self._with_retries(
+                    CREATE_DM_ROUTE, user.id, user.create_dm
+                )
+
+            await self._with_retries(
+                SEND_DM_ROUTE, channel.id, lambda: channel.send(embed=embed)
+            )
+            self.stats["sent"] += 1
+            return True
+        except discord.Forbidden:
+            # DMs disabled by the user, retrying will not help
+            self.stats["failed"] += 1
+            return False
+        except Exception as e:
+            logger.error(f"Failed to send DM to {discord_id}: {e}")
+            self.stats["failed"] += 1
+            return False
+
+    def _bucket(self, route: str, major_id: int) -> TokenBucket:
+        key = (route, major_id)
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            self.buckets.move_to_end(key)
+            return bucket
+
+        if len(self.buckets) >= MAX_BUCKETS:
+            for idle_key in [k for k, b in self.buckets.items() if b.is_idle()]:
+                del self.buckets[idle_key]
+
+        bucket = self.buckets[key] = TokenBucket(
+            config.DM_RATE_PER_SECOND, config.DM_BURST
+        )
+        return bucket
+
+    async def _with_retries(self, route: str, major_id: int, request):
+        """
+        Run a Discord request under its route bucket and the global bucket
+
+        discord.py already retries 5xx responses and sleeps through short rate
+        limits; only limits longer than ``max_ratelimit_timeout`` surface here as
+        ``RateLimited`` and are retried after the requested delay.
+        """
+        for attempt in range(config.DM_MAX_RETRIES + 1):
+            await self._bucket(route, major_id).acquire()
+            await self.global_bucket.acquire()
+            try:
+                return await request()
+            except discord.RateLimited as e:
+                delay = e.retry_after
+
+            if attempt == config.DM_MAX_RETRIES:
+                break
+
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay + random.uniform(0, 1))
+
+        raise RuntimeError(f"{route} still rate limited after {attempt + 1} attempt(s)")
+
+    def get_stats(self) -> dict:
+        """Dispatcher metrics, including p50/p95 end-to-end DM latency"""
+        latencies = sorted(self.latencies)
+        stats = dict(self.stats, queued=self.queue.qsize())
+        if latencies:
+            stats["latencyP50"] = latencies[len(latencies) // 2]
+            stats["latencyP95"] = latencies[int(len(latencies) * 0.95)]
+        return stats
+
+    def close(self):
+        """Stop the worker pool"""
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
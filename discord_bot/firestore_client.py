@@ -1,10 +1,15 @@
+import asyncio
+import functools
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 import firebase_admin
 from config import config
 from firebase_admin import credentials, firestore
 from loguru import logger
 
+_executor: ThreadPoolExecutor | None = None
+
 
 def initialize_firebase():
     try:
@@ -23,3 +28,74 @@ def initialize_firebase():
 def get_db():
     """Get Firestore database client"""
     return firestore.client()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the bounded thread pool that runs blocking Firestore calls"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=config.FIRESTORE_MAX_WORKERS,
+            thread_name_prefix="firestore",
+        )
+    return _executor
+
+
+def shutdown_executor():
+    """Stop the Firestore thread pool, waiting for in-flight calls"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run a blocking Firestore call without blocking the event loop
+
+    Parameters
+    ----------
+    func : callable
+        Synchronous Firestore API call (e.g. ``doc_ref.get``)
+    *args, **kwargs
+        Arguments forwarded to ``func``
+
+    Returns
+    -------
+    Any
+        Whatever ``func`` returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def get_document(doc_ref):
+    """Fetch a document snapshot"""
+    return await run_db(doc_ref.get)
+
+
+async def set_document(doc_ref, data: dict):
+    """Create or overwrite a document"""
+    return await run_db(doc_ref.set, data)
+
+
+async def update_document(doc_ref, data: dict):
+    """Update fields of an existing document"""
+    return await run_db(doc_ref.update, data)
+
+
+async def delete_document(doc_ref):
+    """Delete a document"""
+    return await run_db(doc_ref.delete)
+
+
+async def stream_documents(query) -> list:
+    """Run a collection or query stream to completion and return all snapshots"""
+    return await run_db(lambda: list(query.stream()))
+
+
+async def commit_batch(batch):
+    """Commit a write batch"""
+    return await run_db(batch.commit)
@@ -4,102 +4,545 @@ Listens for game state changes and sends DMs to Discord players
 """
 
 import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 
 import discord
-from bot.utils import send_word_dm
-from firestore_client import get_db
+import game_logic
+from bot.utils import build_word_dm_embed, forget_status_embed
+from config import config
+from dm_dispatcher import DMDispatcher
+from firestore_client import (
+    commit_batch,
+    get_db,
+    get_document,
+    run_db,
+    stream_documents,
+    update_document,
+)
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1 import FieldFilter
 from loguru import logger
+from room_state import RoomStateCache
+from user_sessions import get_cache_stats
+
+PER_ROOM_MODE = "per_room"
+COLLECTION_GROUP_MODE = "collection_group"
+
+# How long fetched room/player data may be reused for DMs of the same deal
+DEAL_CACHE_TTL_SECONDS = 60
 
 
 class FirestoreListener:
     """Listens to Firestore changes and triggers Discord actions"""
 
-    def __init__(self, bot: discord.Client):
+    def __init__(self, bot: discord.Client, mode: str | None = None):
         self.bot = bot
         self.db = get_db()
-        self.active_listeners = {}
+        self.mode = mode or config.LISTENER_MODE
+        if self.mode not in (PER_ROOM_MODE, COLLECTION_GROUP_MODE):
+            raise ValueError(f"Unknown listener mode: {self.mode}")
+
+        # room_id -> per-room watch (None when routed through the shared watch),
+        # ordered from least to most recently active
+        self.active_listeners = OrderedDict()
+        # room_id -> monotonic time of last activity
+        self.last_activity = {}
+        # Eviction reason -> number of listeners evicted
+        self.evictions = {"idle": 0, "lru": 0, "deleted": 0, "inactive": 0}
+        # Guards listener bookkeeping, which Firestore callback threads also touch
+        self._lock = threading.RLock()
+
+        # Shared collection-group watch over all Discord secrets
+        self.secrets_watch = None
+        # Newest secret createdAt seen, so a resubscribe only replays new deals
+        self.watermark = None
+
+        # room_id -> (startedAt, fetched_at, room_data, all_players) of the last deal
+        self.deal_cache = {}
+        # Firestore reads spent fetching deal data, to track reads per game start
+        self.deal_stats = {"deals": 0, "reads": 0}
+
+        self.dm_dispatcher = DMDispatcher(bot)
 
-    def start_room_listener(self, room_id: str):
+        # Live room/player state of rooms whose status was looked up
+        self.room_states = RoomStateCache(self.db)
+
+        # room_id -> player IDs whose seen flag awaits the room's batched write
+        self.pending_seen = {}
+        self._seen_flush_timers = {}
+        self.seen_stats = {"batches": 0, "writes": 0}
+
+    async def start_room_listener(self, room_id: str):
         """Start listening to a specific room for secret changes"""
-        if room_id in self.active_listeners:
-            logger.debug(f"Already listening to room {room_id}")
+        with self._lock:
+            if room_id in self.active_listeners:
+                self.touch_room(room_id)
+                logger.debug(f"Already listening to room {room_id}")
+                return
+
+            # Make room for the new listener by dropping the least recently active
+            overflow = len(self.active_listeners) - config.LISTENER_MAX_ACTIVE + 1
+            lru_room_ids = list(self.active_listeners)[: max(overflow, 0)]
+
+        # Unsubscribe outside the lock, a closing watch may wait on its callback
+        await asyncio.gather(*(self._evict(r, "lru") for r in lru_room_ids))
+
+        if self.mode == COLLECTION_GROUP_MODE:
+            self._ensure_secrets_watch()
+            self._register(room_id, None)
+            logger.info(
+                f"Routing secret changes for room {room_id} "
+                f"(active streams: {self.active_stream_count()})"
+            )
             return
 
-        secrets_ref = (
-            self.db.collection("rooms").document(room_id).collection("secrets")
-        )
+        # Only deals after the room's current one: the first snapshot of a
+        # watch reports every matching secret as ADDED, which would re-send
+        # words of earlier deals. Secrets share their commit time with the
+        # room's startedAt, so anchoring on it (not on the bot's clock) cannot
+        # skip the next deal.
+        room_ref = self.db.collection("rooms").document(room_id)
+        room_doc = await get_document(room_ref)
+        started_at = room_doc.to_dict().get("startedAt") if room_doc.exists else None
+
+        with self._lock:
+            if room_id in self.active_listeners:
+                # Tracked by a concurrent call while the room was read
+                return
+
+        secrets_query = room_ref.collection("secrets")
+        if started_at is not None:
+            secrets_query = secrets_query.where(
+                filter=FieldFilter("createdAt", ">", started_at)
+            )
 
         def on_snapshot(col_snapshot, changes, read_time):
             """Handle Firestore snapshot changes"""
-            for change in changes:
-                if change.type.name == "ADDED":
-                    secret_doc = change.document
-                    secret_data = secret_doc.to_dict()
-
-                    # Check if this player has a Discord ID
-                    discord_id = secret_data.get("discordId")
-                    if discord_id:
-                        # Schedule DM sending in the bot's event loop
-                        # Use asyncio.run_coroutine_threadsafe since Firestore callbacks
-                        # run in a separate thread
-                        asyncio.run_coroutine_threadsafe(
-                            self._send_discord_dm(room_id, discord_id, secret_data),
-                            self.bot.loop,
-                        )
-                        logger.info(
-                            f"Scheduled DM for discord_id={discord_id} in room {room_id}"
-                        )
+            self._handle_secret_changes(changes)
 
         # Start watching the collection
-        watch = secrets_ref.on_snapshot(on_snapshot)
-        self.active_listeners[room_id] = watch
-        logger.info(f"Started listening to room {room_id} for secret changes")
+        watch = secrets_query.on_snapshot(on_snapshot)
+        self._register(room_id, watch)
+        logger.info(
+            f"Started listening to room {room_id} for secret changes "
+            f"(active streams: {self.active_stream_count()})"
+        )
 
-    def stop_room_listener(self, room_id: str):
+    async def stop_room_listener(self, room_id: str) -> bool:
         """Stop listening to a specific room"""
-        if room_id in self.active_listeners:
-            self.active_listeners[room_id].unsubscribe()
-            del self.active_listeners[room_id]
-            logger.info(f"Stopped listening to room {room_id}")
+        # Closing a watch joins its stream thread, which can take up to a second
+        if not await run_db(self._close_room, room_id):
+            return False
+        forget_status_embed(room_id)
+        logger.info(f"Stopped listening to room {room_id}")
+        return True
+
+    def _close_room(self, room_id: str) -> bool:
+        """Close a tracked room's watches; blocking, so not on the event loop"""
+        with self._lock:
+            if room_id not in self.active_listeners:
+                return False
+            watch = self.active_listeners.pop(room_id)
+            self.last_activity.pop(room_id, None)
+            self.deal_cache.pop(room_id, None)
+
+        if watch is not None:
+            watch.unsubscribe()
+        self.room_states.unwatch(room_id)
+        return True
+
+    async def _drop_room_state(self, room_id: str):
+        await run_db(self.room_states.unwatch, room_id)
+        forget_status_embed(room_id)
+
+    async def _drop_stale_room_states(self):
+        """Close status watches of deleted rooms and rooms nobody looks at anymore"""
+        stale_room_ids = self.room_states.stale_rooms(
+            config.ROOM_STATE_IDLE_TTL_SECONDS, config.ROOM_STATE_MAX_WATCHED
+        )
+        await asyncio.gather(*(self._drop_room_state(r) for r in stale_room_ids))
+
+    def _register(self, room_id: str, watch):
+        with self._lock:
+            self.active_listeners[room_id] = watch
+            self.last_activity[room_id] = time.monotonic()
+
+    def touch_room(self, room_id: str):
+        """Mark a room as recently active so it is evicted last"""
+        with self._lock:
+            if room_id in self.active_listeners:
+                self.active_listeners.move_to_end(room_id)
+                self.last_activity[room_id] = time.monotonic()
+
+    async def _evict(self, room_id: str, reason: str):
+        if not await self.stop_room_listener(room_id):
+            return
+        with self._lock:
+            self.evictions[reason] += 1
+        logger.info(f"Evicted listener for room {room_id} ({reason})")
+
+    async def evict_stale_listeners(self):
+        """
+        Drop listeners for rooms that went idle, were deleted, or are past
+        the inactivity cutoff
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle_room_ids = [
+                room_id
+                for room_id, last_active in self.last_activity.items()
+                if now - last_active > config.LISTENER_IDLE_TTL_SECONDS
+            ]
+        await asyncio.gather(*(self._evict(r, "idle") for r in idle_room_ids))
+
+        await self._drop_stale_room_states()
+
+        with self._lock:
+            room_watches = list(self.active_listeners.items())
+        if not room_watches:
+            return
+
+        # Rooms with live state are checked from memory. The rest are read only
+        # if they hold a stream: rooms routed through the shared secrets watch
+        # cost nothing but bookkeeping, which idle and LRU eviction bound
+        rooms = {}
+        unloaded_room_ids = []
+        for room_id, watch in room_watches:
+            loaded, room_data = self.room_states.get_room_data(room_id)
+            if loaded:
+                rooms[room_id] = room_data
+            elif watch is not None:
+                unloaded_room_ids.append(room_id)
+
+        if unloaded_room_ids:
+            room_refs = [
+                self.db.collection("rooms").document(r) for r in unloaded_room_ids
+            ]
+            room_docs = await run_db(lambda: list(self.db.get_all(room_refs)))
+            for room_doc in room_docs:
+                rooms[room_doc.id] = room_doc.to_dict() if room_doc.exists else None
+
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            hours=config.LISTENER_ROOM_MAX_AGE_HOURS
+        )
+        evictions = []
+        for room_id, room_data in rooms.items():
+            if room_data is None:
+                evictions.append(self._evict(room_id, "deleted"))
+                continue
+
+            last_started = room_data.get("startedAt") or room_data.get("createdAt")
+            if last_started and last_started < cutoff:
+                evictions.append(self._evict(room_id, "inactive"))
+        await asyncio.gather(*evictions)
+
+    async def run_maintenance(self):
+        """
+        Periodically evict stale listeners, reopen a dead secrets watch and
+        report listener counts
+        """
+        while True:
+            await asyncio.sleep(config.LISTENER_SWEEP_INTERVAL_SECONDS)
+            try:
+                if self.secrets_watch is not None and not self.secrets_watch.is_active:
+                    # The watch gave up after a non-retryable stream error
+                    logger.warning("Secrets listener stopped, resubscribing")
+                    await self.restart_secrets_watch()
+                await self.evict_stale_listeners()
+                logger.info(f"Listener stats: {self.get_stats()}")
+            except Exception as e:
+                logger.error(f"Error during listener maintenance: {e}")
+
+    def _ensure_secrets_watch(self):
+        """Open the shared collection-group watch if it is not running yet"""
+        if self.secrets_watch is not None:
+            return
+
+        if self.watermark is None:
+            self.watermark = datetime.now(timezone.utc)
+
+        query = (
+            self.db.collection_group("secrets")
+            .where(filter=FieldFilter("discordId", "!=", None))
+            .where(filter=FieldFilter("createdAt", ">", self.watermark))
+        )
+
+        def on_snapshot(col_snapshot, changes, read_time):
+            """Handle Firestore snapshot changes"""
+            self._handle_secret_changes(changes)
+
+        self.secrets_watch = query.on_snapshot(on_snapshot)
+        logger.info(
+            f"Started collection-group secrets listener from {self.watermark.isoformat()}"
+        )
+
+    async def restart_secrets_watch(self):
+        """Reopen the shared watch, replaying only secrets newer than the watermark"""
+        if self.secrets_watch is not None:
+            await run_db(self.secrets_watch.unsubscribe)
+            self.secrets_watch = None
+        self._ensure_secrets_watch()
+
+    def _handle_secret_changes(self, changes):
+        """Fan secret changes out as one DM delivery per room and deal"""
+        # Secrets of one deal are committed in one batch and arrive together,
+        # so group them per room and deliver each group as a single deal
+        deals = {}
+
+        for change in changes:
+            # A restart deal overwrites existing secrets, which arrives as MODIFIED
+            if change.type.name not in ("ADDED", "MODIFIED"):
+                continue
+
+            secret_doc = change.document
+            room_id = secret_doc.reference.parent.parent.id
+            # The shared watch sees every Discord secret, including rooms whose
+            # listener was evicted since, and those deals must still be sent
+            if self.mode == PER_ROOM_MODE and room_id not in self.active_listeners:
+                continue
+            self.touch_room(room_id)
 
-    async def _send_discord_dm(self, room_id: str, discord_id: str, secret: dict):
+            secret_data = secret_doc.to_dict()
+
+            created_at = secret_data.get("createdAt")
+            if created_at and (self.watermark is None or created_at > self.watermark):
+                self.watermark = created_at
+
+            # Check if this player has a Discord ID
+            if secret_data.get("discordId"):
+                deals.setdefault(room_id, []).append(secret_data)
+
+        for room_id, secrets in deals.items():
+            # Schedule DM sending in the bot's event loop
+            # Use asyncio.run_coroutine_threadsafe since Firestore callbacks
+            # run in a separate thread
+            asyncio.run_coroutine_threadsafe(
+                self._deliver_deal(room_id, secrets), self.bot.loop
+            )
+            logger.info(f"Scheduled {len(secrets)} DM(s) in room {room_id}")
+
+    def active_stream_count(self) -> int:
+        """Number of open Firestore watch streams held by the bot"""
+        with self._lock:
+            per_room = sum(1 for w in self.active_listeners.values() if w is not None)
+        return (
+            per_room
+            + self.room_states.stream_count()
+            + (1 if self.secrets_watch is not None else 0)
+        )
+
+    async def get_room_status(self, room_id: str) -> dict | None:
+        """
+        Get a room's status, from live state once it has been looked up
+
+        The first lookup starts watching the room's state and is answered from
+        the watch's first snapshots, so repeated status checks are served from
+        memory without a separate read. If the snapshots take longer than
+        ``ROOM_STATE_LOAD_TIMEOUT_SECONDS`` the room is read instead. A room
+        that does not exist is not kept watched. It does not track the room
+        for secrets.
+
+        Parameters
+        ----------
+        room_id : str
+            Room to look up
+
+        Returns
+        -------
+        dict | None
+            Room status as returned by ``game_logic.get_room_status``,
+            None if the room does not exist
+        """
+        hit, room_status = self.room_states.get_status(room_id)
+        if hit:
+            self.touch_room(room_id)
+            return room_status
+
+        await run_db(self.room_states.watch, room_id)
+        if await self.room_states.wait_loaded(
+            room_id, config.ROOM_STATE_LOAD_TIMEOUT_SECONDS
+        ):
+            hit, room_status = self.room_states.get_status(room_id)
+        if not hit:
+            room_status = await game_logic.get_room_status(room_id)
+
+        if room_status is None:
+            await self._drop_room_state(room_id)
+        await self._drop_stale_room_states()
+        return room_status
+
+    def get_stats(self) -> dict:
+        """Listener metrics for logging and monitoring"""
+        return {
+            "mode": self.mode,
+            "activeStreams": self.active_stream_count(),
+            "trackedRooms": len(self.active_listeners),
+            "evictedListeners": sum(self.evictions.values()),
+            "evictionsByReason": dict(self.evictions),
+            "deals": self.deal_stats["deals"],
+            "dealReads": self.deal_stats["reads"],
+            "dms": self.dm_dispatcher.get_stats(),
+            "seenBatches": self.seen_stats["batches"],
+            "seenWrites": self.seen_stats["writes"],
+            "roomStates": self.room_states.get_stats(),
+            "sessionCache": get_cache_stats(),
+            "roomCodes": game_logic.get_room_code_stats(),
+        }
+
+    async def _fetch_deal_context(self, room_id: str, started_at) -> tuple:
+        """
+        Fetch the room and its players once per deal
+
+        Parameters
+        ----------
+        room_id : str
+            Room the deal belongs to
+        started_at : datetime | None
+            Deal timestamp; secrets share the commit time with the room's startedAt
+
+        Returns
+        -------
+        tuple
+            (room_data, all_players, reads) where reads is the number of
+            Firestore document reads spent (0 on a cache hit)
+        """
+        cached = self.deal_cache.get(room_id)
+        if (
+            cached
+            and started_at is not None
+            and cached[0] == started_at
+            and time.monotonic() - cached[1] < DEAL_CACHE_TTL_SECONDS
+        ):
+            return cached[2], cached[3], 0
+
+        room_ref = self.db.collection("rooms").document(room_id)
+        room_doc, players_docs = await asyncio.gather(
+            get_document(room_ref), stream_documents(room_ref.collection("players"))
+        )
+        room_data = room_doc.to_dict() if room_doc.exists else None
+        all_players = {doc.id: doc.to_dict() for doc in players_docs}
+
+        if room_data and room_id in self.active_listeners:
+            self.deal_cache[room_id] = (
+                room_data.get("startedAt"),
+                time.monotonic(),
+                room_data,
+                all_players,
+            )
+
+        return room_data, all_players, 1 + len(players_docs)
+
+    async def _deliver_deal(self, room_id: str, secrets: list[dict]):
+        """Send DMs for all Discord secrets of one deal from a single fetch"""
+        try:
+            room_data, all_players, reads = await self._fetch_deal_context(
+                room_id, secrets[0].get("createdAt")
+            )
+            self.deal_stats["deals"] += 1
+            self.deal_stats["reads"] += reads
+            logger.info(
+                f"Deal for room {room_id}: {len(secrets)} DM(s), "
+                f"{reads} Firestore read(s)"
+            )
+
+            await asyncio.gather(
+                *(
+                    self._send_discord_dm(
+                        room_id, secret["discordId"], secret, room_data, all_players
+                    )
+                    for secret in secrets
+                )
+            )
+            await self._flush_seen(room_id)
+        except Exception as e:
+            logger.error(f"Error delivering deal for room {room_id}: {e}")
+
+    def _mark_seen(self, room_id: str, player_id: str):
+        """Queue a seen flag; flushed when the deal settles or the window ends"""
+        self.pending_seen.setdefault(room_id, set()).add(player_id)
+
+        if room_id not in self._seen_flush_timers:
+            loop = asyncio.get_running_loop()
+            self._seen_flush_timers[room_id] = loop.call_later(
+                config.SEEN_FLUSH_WINDOW_SECONDS,
+                lambda: asyncio.create_task(self._flush_seen(room_id)),
+            )
+
+    async def _flush_seen(self, room_id: str):
+        """Write all pending seen flags of a room in one batch"""
+        timer = self._seen_flush_timers.pop(room_id, None)
+        if timer:
+            timer.cancel()
+
+        player_ids = self.pending_seen.pop(room_id, None)
+        if not player_ids:
+            return
+
+        players_ref = (
+            self.db.collection("rooms").document(room_id).collection("players")
+        )
+        batch = self.db.batch()
+        for player_id in player_ids:
+            batch.update(players_ref.document(player_id), {"seen": True})
+
+        try:
+            await commit_batch(batch)
+            self.seen_stats["batches"] += 1
+            self.seen_stats["writes"] += len(player_ids)
+            logger.info(f"Marked {len(player_ids)} player(s) as seen in room {room_id}")
+            return
+        except NotFound:
+            # A player left after the deal; one missing document fails the whole
+            # batch, so fall back to updating players one by one
+            logger.warning(
+                f"Seen batch for room {room_id} hit a missing player, "
+                "updating players individually"
+            )
+        except Exception as e:
+            logger.error(f"Failed to mark players as seen in room {room_id}: {e}")
+            return
+
+        results = await asyncio.gather(
+            *(
+                update_document(players_ref.document(player_id), {"seen": True})
+                for player_id in player_ids
+            ),
+            return_exceptions=True,
+        )
+        written = sum(1 for result in results if not isinstance(result, Exception))
+        self.seen_stats["writes"] += written
+        logger.info(
+            f"Marked {written}/{len(player_ids)} player(s) as seen in room {room_id}"
+        )
+
+    async def _send_discord_dm(
+        self,
+        room_id: str,
+        discord_id: str,
+        secret: dict,
+        room_data: dict | None,
+        all_players: dict,
+    ):
         """Send DM to a Discord user with their role and word"""
         try:
-            user_id = int(discord_id)
-            user = await self.bot.fetch_user(user_id)
-
-            if user:
-                # Fetch room data and all players for speaking order
-                room_ref = self.db.collection("rooms").document(room_id)
-                room_doc = room_ref.get()
-                room_data = room_doc.to_dict() if room_doc.exists else None
-
-                # Fetch all players
-                players_ref = room_ref.collection("players")
-                players_docs = list(players_ref.stream())
-                all_players = {doc.id: doc.to_dict() for doc in players_docs}
-
-                success = await send_word_dm(
-                    user, room_id, secret, room_data, all_players
+            embed = build_word_dm_embed(room_id, secret, room_data, all_players)
+            success = await self.dm_dispatcher.send(
+                discord_id, embed, secret.get("createdAt")
+            )
+            if success and discord_id in all_players:
+                # Mark player as having seen their word; players missing from the
+                # deal's player list left the room and have no document to update
+                self._mark_seen(room_id, discord_id)
+                logger.success(
+                    f"Sent DM to Discord user {discord_id} for room {room_id}"
                 )
-                if success:
-                    # Mark player as having seen their word
-                    player_ref = (
-                        self.db.collection("rooms")
-                        .document(room_id)
-                        .collection("players")
-                        .document(discord_id)
-                    )
-                    player_ref.update({"seen": True})
-                    logger.success(
-                        f"Sent DM to Discord user {user.name} for room {room_id} and marked as seen"
-                    )
-                else:
-                    logger.warning(
-                        f"Failed to send DM to Discord user {user.name} for room {room_id}"
-                    )
             else:
-                logger.error(f"Could not find Discord user with ID {discord_id}")
+                logger.warning(
+                    f"Failed to send DM to Discord user {discord_id} for room {room_id}"
+                )
 
         except Exception as e:
             logger.error(f"Error sending Discord DM: {e}")
@@ -107,4 +550,11 @@ class FirestoreListener:
     def cleanup(self):
         """Stop all listeners"""
         for room_id in list(self.active_listeners.keys()):
-            self.stop_room_listener(room_id)
+            self._close_room(room_id)
+
+        if self.secrets_watch is not None:
+            self.secrets_watch.unsubscribe()
+            self.secrets_watch = None
+
+        self.room_states.close()
+        self.dm_dispatcher.close()
@@ -1,10 +1,29 @@
+import asyncio
 import random
 import string
-
-from firestore_client import get_db
-from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+import time
+
+from firestore_client import (
+    commit_batch,
+    get_db,
+    get_document,
+    run_db,
+    stream_documents,
+)
+from google.api_core.exceptions import Conflict
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP, transactional
 from loguru import logger
 
+ROOM_CODE_MAX_ATTEMPTS = 5
+
+# Room code allocation metrics, see get_room_code_stats()
+room_code_stats = {
+    "allocations": 0,
+    "collisions": 0,
+    "failures": 0,
+    "latencySeconds": 0.0,
+}
+
 
 def generate_room_id():
     chars = string.ascii_uppercase + string.digits
@@ -12,21 +31,68 @@ def generate_room_id():
     return "".join(random.choice(chars) for _ in range(6))
 
 
+async def allocate_room_code(create) -> str:
+    """
+    Reserve a fresh room code by creating its room document
+
+    The room is written with create semantics, so a code taken by a concurrent
+    creator (bot or web) fails the write instead of being overwritten; only
+    then is another code drawn. No read precedes the write.
+
+    Parameters
+    ----------
+    create : Callable[[DocumentReference], Awaitable]
+        Writes the new room at the given reference, raising
+        ``google.api_core.exceptions.Conflict`` if it already exists
+
+    Returns
+    -------
+    str
+        The allocated room code
+    """
+    db = get_db()
+    started = time.perf_counter()
+
+    for _ in range(ROOM_CODE_MAX_ATTEMPTS):
+        room_id = generate_room_id()
+        try:
+            await create(db.collection("rooms").document(room_id))
+        except Conflict:
+            room_code_stats["collisions"] += 1
+            logger.warning(f"Room code {room_id} is taken, drawing another")
+            continue
+
+        room_code_stats["allocations"] += 1
+        room_code_stats["latencySeconds"] += time.perf_counter() - started
+        return room_id
+
+    room_code_stats["failures"] += 1
+    raise RuntimeError(
+        f"Could not allocate a free room code in {ROOM_CODE_MAX_ATTEMPTS} attempts"
+    )
+
+
+def get_room_code_stats() -> dict:
+    """Room code allocation counters, collision rate and mean create latency"""
+    attempts = room_code_stats["allocations"] + room_code_stats["collisions"]
+    allocations = room_code_stats["allocations"]
+    return {
+        "allocations": allocations,
+        "collisions": room_code_stats["collisions"],
+        "failures": room_code_stats["failures"],
+        "collisionRate": room_code_stats["collisions"] / attempts if attempts else 0.0,
+        "avgCreateMs": (
+            room_code_stats["latencySeconds"] / allocations * 1000
+            if allocations
+            else 0.0
+        ),
+    }
+
+
 async def create_room(
     user_id: str, username: str, source: str = "discord", channel_id: str | None = None
 ):
     db = get_db()
-    room_id = generate_room_id()
-
-    # Check if room already exists
-    room_ref = db.collection("rooms").document(room_id)
-    room_doc = room_ref.get()
-
-    # Regenerate if exists (unlikely but possible)
-    while room_doc.exists:
-        room_id = generate_room_id()
-        room_ref = db.collection("rooms").document(room_id)
-        room_doc = room_ref.get()
 
     # Create room document
     room_data = {
@@ -40,10 +106,7 @@ async def create_room(
     if channel_id:
         room_data["discordChannelId"] = channel_id
 
-    room_ref.set(room_data)
-
     # Create host player document
-    player_ref = room_ref.collection("players").document(user_id)
     player_data = {
         "name": username,
         "isHost": True,
@@ -54,18 +117,23 @@ async def create_room(
         "discordId": user_id,
     }
 
-    player_ref.set(player_data)
+    async def create(room_ref):
+        # Room and host land in one commit; a taken code fails the whole batch
+        batch = db.batch()
+        batch.create(room_ref, room_data)
+        batch.set(room_ref.collection("players").document(user_id), player_data)
+        await commit_batch(batch)
 
-    return room_id
+    return await allocate_room_code(create)
 
 
-async def join_room(room_id: str, user_id: str, username: str, source: str = "discord"):
-    db = get_db()
-    room_ref = db.collection("rooms").document(room_id)
-    room_doc = room_ref.get()
+@transactional
+def _join_room_transaction(transaction, room_ref, player_ref, player_data: dict):
+    """Check the room still accepts players and add the player atomically"""
+    room_doc = room_ref.get(transaction=transaction)
 
     if not room_doc.exists:
-        raise ValueError(f"Room {room_id} does not exist")
+        raise ValueError(f"Room {room_ref.id} does not exist")
 
     room_data = room_doc.to_dict()
 
@@ -75,6 +143,19 @@ async def join_room(room_id: str, user_id: str, username: str, source: str = "di
     if room_data.get("status") != "lobby":
         raise ValueError("Game has already started")
 
+    transaction.set(player_ref, player_data)
+
+
+async def join_room(room_id: str, user_id: str, username: str, source: str = "discord"):
+    """
+    Add a player to a room in a transaction
+
+    The status/allowJoin checks and the player write commit together, so a
+    join racing with the game start either lands before it or is rejected.
+    """
+    db = get_db()
+    room_ref = db.collection("rooms").document(room_id)
+
     # Add player
     player_ref = room_ref.collection("players").document(user_id)
     player_data = {
@@ -89,7 +170,9 @@ async def join_room(room_id: str, user_id: str, username: str, source: str = "di
     if source == "discord":
         player_data["discordId"] = user_id
 
-    player_ref.set(player_data)
+    await run_db(
+        _join_room_transaction, db.transaction(), room_ref, player_ref, player_data
+    )
 
     return room_id
 
@@ -97,7 +180,7 @@ async def join_room(room_id: str, user_id: str, username: str, source: str = "di
 async def get_room_status(room_id: str):
     db = get_db()
     room_ref = db.collection("rooms").document(room_id)
-    room_doc = room_ref.get()
+    room_doc = await get_document(room_ref)
 
     if not room_doc.exists:
         return None
@@ -106,7 +189,7 @@ async def get_room_status(room_id: str):
 
     # Get players
     players_ref = room_ref.collection("players")
-    players_docs = players_ref.stream()
+    players_docs = await stream_documents(players_ref)
 
     players = []
     for doc in players_docs:
@@ -125,9 +208,18 @@ async def get_room_status(room_id: str):
 
 
 async def restart_game(room_id: str, host_uid: str):
+    """
+    Reset seen flags and move the room to 'started' in one batched write
+
+    The on_game_start Cloud Function owns secret teardown and re-deal,
+    so the bot does not touch secrets here.
+    """
     db = get_db()
     room_ref = db.collection("rooms").document(room_id)
-    room_doc = room_ref.get()
+    players_ref = room_ref.collection("players")
+    room_doc, players_docs = await asyncio.gather(
+        get_document(room_ref), stream_documents(players_ref)
+    )
 
     if not room_doc.exists:
         raise ValueError(f"Room {room_id} does not exist")
@@ -137,22 +229,14 @@ async def restart_game(room_id: str, host_uid: str):
     if room_data.get("hostUid") != host_uid:
         raise ValueError("Only the host can restart the game")
 
-    players_ref = room_ref.collection("players")
-    players_docs = list(players_ref.stream())
-
     if len(players_docs) < 2:
         raise ValueError("Need at least 3 players to restart")
 
-    secrets_ref = room_ref.collection("secrets")
-    secrets_docs = list(secrets_ref.stream())
-
+    batch = db.batch()
     for player_doc in players_docs:
-        player_ref = room_ref.collection("players").document(player_doc.id)
-        player_ref.update({"seen": False})
-
-    for secret_doc in secrets_docs:
-        secret_doc.reference.delete()
-
-    room_ref.update({"status": "started"})
+        if player_doc.to_dict().get("seen") is not False:
+            batch.update(player_doc.reference, {"seen": False})
+    batch.update(room_ref, {"status": "started"})
+    await commit_batch(batch)
 
     logger.info(f"Game restarted for room {room_id} by host {host_uid}")
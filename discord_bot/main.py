@@ -4,7 +4,7 @@ import sys
 import bot.commands  # noqa: F401 - Import to register commands with bot
 from bot.bot import bot, start_bot
 from config import config
-from firestore_client import initialize_firebase
+from firestore_client import initialize_firebase, shutdown_executor
 from firestore_listener import FirestoreListener
 from loguru import logger
 
@@ -33,6 +33,7 @@ async def main():
     # Initialize Firestore listener
     listener = FirestoreListener(bot)
     bot.firestore_listener = listener  # Attach to bot for access in commands
+    maintenance_task = asyncio.create_task(listener.run_maintenance())
     logger.success("Firestore listener initialized")
 
     while True:
@@ -40,7 +41,9 @@ async def main():
             await start_bot()
         except KeyboardInterrupt:
             logger.info("Shutting down bot...")
+            maintenance_task.cancel()
             listener.cleanup()  # Clean up listeners
+            shutdown_executor()
             await bot.close()
             break
         except Exception as e:
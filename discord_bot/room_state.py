@@ -0,0 +1,265 @@
+"""
+Live room-state cache for Discord bot
+Keeps rooms whose status was looked up, and their players, current from
+Firestore snapshot listeners, so repeated status lookups are served from memory
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from loguru import logger
+
+
+class RoomState:
+    """Latest known state of one room; ``exists`` and ``players`` are None until loaded"""
+
+    __slots__ = ("room_data", "exists", "players", "version")
+
+    def __init__(self):
+        self.room_data = None
+        self.exists = None
+        self.players = None
+        # Bumped on every snapshot, lets callers memoize work per state
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.exists is not None and (not self.exists or self.players is not None)
+
+
+class RoomStateCache:
+    """Room and player state per watched room, fed by snapshot listeners"""
+
+    def __init__(self, db):
+        self.db = db
+        # room_id -> RoomState
+        self.states = {}
+        # room_id -> (room watch, players watch), least recently looked up first
+        self.watches = OrderedDict()
+        # room_id -> monotonic time of the last status lookup
+        self.last_access = {}
+        self.stats = {"hits": 0, "misses": 0, "updates": 0}
+        # room_id -> [(loop, asyncio.Event)] of lookups awaiting the first snapshots
+        self._load_waiters = {}
+        # Snapshot callbacks run on Firestore threads, reads on the event loop
+        self._lock = threading.Lock()
+
+    def watch(self, room_id: str):
+        """Start keeping a room's state current; no-op if already watched"""
+        with self._lock:
+            if room_id in self.watches:
+                return
+            self.states[room_id] = RoomState()
+            self.watches[room_id] = None
+            self.last_access[room_id] = time.monotonic()
+
+        room_ref = self.db.collection("rooms").document(room_id)
+
+        def on_room_snapshot(doc_snapshots, changes, read_time):
+            self._update_room(room_id, doc_snapshots[0] if doc_snapshots else None)
+
+        def on_players_snapshot(col_snapshot, changes, read_time):
+            self._update_players(room_id, col_snapshot)
+
+        watches = (
+            room_ref.on_snapshot(on_room_snapshot),
+            room_ref.collection("players").on_snapshot(on_players_snapshot),
+        )
+        with self._lock:
+            if room_id in self.watches:
+                self.watches[room_id] = watches
+                return
+
+        # Unwatched while the streams were opening
+        for watch in watches:
+            watch.unsubscribe()
+
+    def unwatch(self, room_id: str):
+        """Stop the room's snapshot listeners and drop its cached state"""
+        with self._lock:
+            self.states.pop(room_id, None)
+            self.last_access.pop(room_id, None)
+            watches = self.watches.pop(room_id, None)
+            waiters = self._load_waiters.pop(room_id, [])
+
+        self._wake(waiters)
+        for watch in watches or ():
+            watch.unsubscribe()
+
+    async def wait_loaded(self, room_id: str, timeout: float) -> bool:
+        """
+        Wait for a watched room's first room and players snapshots
+
+        Parameters
+        ----------
+        room_id : str
+            Watched room
+        timeout : float
+            Seconds to wait for the snapshots
+
+        Returns
+        -------
+        bool
+            Whether the room's state is loaded, False on a timeout or if the
+            room was unwatched meanwhile
+        """
+        loaded = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), loaded)
+        with self._lock:
+            state = self.states.get(room_id)
+            if state is None or state.loaded:
+                return state is not None
+            self._load_waiters.setdefault(room_id, []).append(waiter)
+
+        try:
+            await asyncio.wait_for(loaded.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                waiters = self._load_waiters.get(room_id, [])
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    self._load_waiters.pop(room_id, None)
+
+        with self._lock:
+            state = self.states.get(room_id)
+            return state is not None and state.loaded
+
+    def _loaded_waiters(self, room_id: str, state: RoomState) -> list:
+        """Waiters to wake once the state is loaded; call with the lock held"""
+        if not state.loaded:
+            return []
+        return self._load_waiters.pop(room_id, [])
+
+    @staticmethod
+    def _wake(waiters: list):
+        # Snapshot callbacks run on Firestore threads, hand over to each loop
+        for loop, loaded in waiters:
+            loop.call_soon_threadsafe(loaded.set)
+
+    def _update_room(self, room_id: str, room_doc):
+        with self._lock:
+            state = self.states.get(room_id)
+            if state is None:
+                return
+            state.exists = bool(room_doc and room_doc.exists)
+            state.room_data = room_doc.to_dict() if state.exists else None
+            state.version += 1
+            self.stats["updates"] += 1
+            waiters = self._loaded_waiters(room_id, state)
+
+        self._wake(waiters)
+
+    def _update_players(self, room_id: str, player_docs):
+        players = []
+        for doc in player_docs:
+            player_data = doc.to_dict()
+            player_data["uid"] = doc.id
+            players.append(player_data)
+
+        with self._lock:
+            state = self.states.get(room_id)
+            if state is None:
+                return
+            state.players = players
+            state.version += 1
+            self.stats["updates"] += 1
+            waiters = self._loaded_waiters(room_id, state)
+
+        self._wake(waiters)
+
+    def get_status(self, room_id: str) -> tuple[bool, dict | None]:
+        """
+        Get a room's status from memory
+
+        Parameters
+        ----------
+        room_id : str
+            Room to look up
+
+        Returns
+        -------
+        tuple[bool, dict | None]
+            (hit, status); on a hit status has the shape of
+            ``game_logic.get_room_status`` plus ``version``, or is None for a
+            deleted room. On a miss the caller has to read Firestore.
+        """
+        with self._lock:
+            state = self.states.get(room_id)
+            if state is None or not state.loaded:
+                self.stats["misses"] += 1
+                return False, None
+
+            self.stats["hits"] += 1
+            self.watches.move_to_end(room_id)
+            self.last_access[room_id] = time.monotonic()
+            if not state.exists:
+                return True, None
+
+            room_data = state.room_data
+            return True, {
+                "room_id": room_id,
+                "status": room_data.get("status"),
+                "hostUid": room_data.get("hostUid"),
+                "hostSource": room_data.get("hostSource"),
+                "allowJoin": room_data.get("allowJoin"),
+                "players": list(state.players),
+                "version": state.version,
+            }
+
+    def get_room_data(self, room_id: str) -> tuple[bool, dict | None]:
+        """(loaded, room data) of a watched room, room data is None if deleted"""
+        with self._lock:
+            state = self.states.get(room_id)
+            if state is None or state.exists is None:
+                return False, None
+            return True, state.room_data
+
+    def stale_rooms(self, max_idle: float, max_watched: int) -> list[str]:
+        """
+        Rooms whose watches should be closed
+
+        Parameters
+        ----------
+        max_idle : float
+            Seconds without a status lookup after which a room is dropped
+        max_watched : int
+            Number of rooms to keep watched, the least recently looked up
+            rooms beyond it are dropped
+
+        Returns
+        -------
+        list[str]
+            Deleted rooms, idle rooms and the overflow, in that order
+        """
+        now = time.monotonic()
+        with self._lock:
+            deleted = [r for r, state in self.states.items() if state.exists is False]
+            dropped = set(deleted)
+            idle = [
+                r
+                for r, last_access in self.last_access.items()
+                if now - last_access > max_idle and r not in dropped
+            ]
+            dropped.update(idle)
+            remaining = [r for r in self.watches if r not in dropped]
+        return deleted + idle + remaining[: max(len(remaining) - max_watched, 0)]
+
+    def stream_count(self) -> int:
+        """Number of open snapshot streams"""
+        with self._lock:
+            return sum(len(w) for w in self.watches.values() if w is not None)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats, rooms=len(self.states))
+
+    def close(self):
+        """Stop all snapshot listeners"""
+        for room_id in list(self.watches):
+            self.unwatch(room_id)
+        logger.info("Closed room state listeners")
@@ -0,0 +1,330 @@
+"""
+Shared fixtures for the Discord bot tests
+
+Bot modules reach Firestore only through ``firestore_client``, which is
+replaced here by an in-memory fake that counts reads and writes. ``bot.bot``
+is replaced by a bare bot object so command callbacks can be called directly.
+Third-party packages are stubbed only when they are not installed.
+"""
+
+import sys
+import types
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def _install(name: str, module: types.ModuleType):
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+
+
+def _stub_if_missing(name: str, **attrs):
+    try:
+        __import__(name)
+    except ImportError:
+        for i, part in enumerate(name.split(".")):
+            prefix = ".".join(name.split(".")[: i + 1])
+            if prefix not in sys.modules:
+                _install(prefix, types.ModuleType(prefix))
+        module = sys.modules[name]
+        for key, value in attrs.items():
+            setattr(module, key, value)
+
+
+class _Logger:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class _Embed:
+    def __init__(self, title=None, description=None, color=None):
+        self.title = title
+        self.description = description
+        self.fields = []
+
+    def add_field(self, name, value, inline=True):
+        self.fields.append((name, value))
+
+    def set_footer(self, text=None):
+        self.footer = text
+
+
+class _HTTPException(Exception):
+    def __init__(self, status: int = 500):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class _RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited for {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _View:
+    def __init__(self, timeout=None):
+        self.children = []
+
+    def add_item(self, item):
+        self.children.append(item)
+
+
+def transactional(func):
+    """Run ``func`` in the transaction and commit it unless ``func`` raises"""
+
+    def run(transaction, *args, **kwargs):
+        result = func(transaction, *args, **kwargs)
+        transaction.commit()
+        return result
+
+    return run
+
+
+_stub_if_missing("loguru", logger=_Logger())
+_stub_if_missing("dotenv", load_dotenv=lambda *args, **kwargs: None)
+_stub_if_missing(
+    "google.api_core.exceptions",
+    Conflict=type("Conflict", (Exception,), {}),
+    NotFound=type("NotFound", (Exception,), {}),
+)
+_stub_if_missing(
+    "google.cloud.firestore_v1",
+    SERVER_TIMESTAMP=object(),
+    FieldFilter=lambda *args, **kwargs: (args, kwargs),
+    transactional=transactional,
+)
+_stub_if_missing(
+    "discord",
+    Embed=_Embed,
+    Color=types.SimpleNamespace(
+        blue=lambda: "blue", green=lambda: "green", purple=lambda: "purple"
+    ),
+    ButtonStyle=types.SimpleNamespace(green="green", blurple="blurple", gray="gray"),
+    Interaction=object,
+    Client=object,
+    User=object,
+    HTTPException=_HTTPException,
+    Forbidden=type("Forbidden", (_HTTPException,), {}),
+    RateLimited=_RateLimited,
+)
+_stub_if_missing(
+    "discord.ui", View=_View, Button=lambda **kwargs: types.SimpleNamespace(**kwargs)
+)
+_stub_if_missing("discord.app_commands", describe=lambda **kwargs: lambda f: f)
+
+
+from google.api_core.exceptions import Conflict, NotFound
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self.exists else None
+
+
+class FakeWatch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+
+
+class FakeDocument:
+    def __init__(self, db, path: tuple):
+        self.db = db
+        self.path = path
+        self.id = path[-1]
+
+    def collection(self, name):
+        return FakeCollection(self.db, self.path + (name,))
+
+    def get(self, transaction=None):
+        self.db.ops["get"] += 1
+        return FakeSnapshot(self, self.db.docs.get(self.path))
+
+    def set(self, data):
+        self.db.ops["write"] += 1
+        self.db.docs[self.path] = dict(data)
+
+    def update(self, data):
+        if self.path not in self.db.docs:
+            raise NotFound(f"No document to update: {'/'.join(self.path)}")
+        self.db.ops["write"] += 1
+        self.db.docs[self.path] = {**self.db.docs[self.path], **data}
+
+    def delete(self):
+        self.db.ops["write"] += 1
+        self.db.docs.pop(self.path, None)
+
+    def on_snapshot(self, callback):
+        return self.db.listen(self.path, callback)
+
+
+class FakeCollection:
+    def __init__(self, db, path: tuple):
+        self.db = db
+        self.path = path
+        self.filters = []
+
+    def document(self, doc_id):
+        return FakeDocument(self.db, self.path + (doc_id,))
+
+    def stream(self, transaction=None):
+        self.db.ops["stream"] += 1
+        return self.snapshots()
+
+    def snapshots(self):
+        return [
+            FakeSnapshot(FakeDocument(self.db, path), data)
+            for path, data in list(self.db.docs.items())
+            if path[:-1] == self.path
+        ]
+
+    def where(self, filter=None):
+        return FakeQuery(self.db, self.path, self.filters + [filter])
+
+    def on_snapshot(self, callback):
+        watch = self.db.listen(self.path, callback)
+        watch.filters = self.filters
+        return watch
+
+
+class FakeQuery(FakeCollection):
+    """Collection query; filters are recorded for assertions, not applied"""
+
+    def __init__(self, db, path: tuple, filters: list):
+        super().__init__(db, path)
+        self.filters = filters
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def create(self, ref, data):
+        self.writes.append(("create", ref, data))
+
+    def set(self, ref, data):
+        self.writes.append(("set", ref, data))
+
+    def update(self, ref, data):
+        self.writes.append(("update", ref, data))
+
+    def delete(self, ref):
+        self.writes.append(("delete", ref, None))
+
+    def commit(self):
+        self.db.ops["commit"] += 1
+        # Batches are atomic: one missing or existing document fails every write
+        for kind, ref, data in self.writes:
+            if kind == "update" and ref.path not in self.db.docs:
+                raise NotFound(f"No document to update: {'/'.join(ref.path)}")
+            if kind == "create" and ref.path in self.db.docs:
+                raise Conflict(f"Document already exists: {'/'.join(ref.path)}")
+        for kind, ref, data in self.writes:
+            self.db.ops["write"] += 1
+            if kind == "delete":
+                self.db.docs.pop(ref.path, None)
+            elif kind == "update":
+                self.db.docs[ref.path] = {**self.db.docs[ref.path], **data}
+            else:
+                self.db.docs[ref.path] = dict(data)
+
+
+class FakeTransaction(FakeBatch):
+    """Transaction writes, committed once the transactional function returns"""
+
+
+class FakeDb:
+    """In-memory Firestore counting gets, streams, commits and written documents"""
+
+    def __init__(self):
+        self.docs = {}
+        self.ops = Counter()
+        # path -> the latest snapshot watch opened on it
+        self.watches = {}
+
+    def collection(self, name):
+        return FakeCollection(self, (name,))
+
+    def collection_group(self, name):
+        return FakeCollection(self, ("*", name))
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def get_all(self, refs):
+        return [ref.get() for ref in refs]
+
+    def add(self, path: str, data: dict):
+        """Seed a document without counting it"""
+        self.docs[tuple(path.split("/"))] = dict(data)
+
+    def listen(self, path: tuple, callback):
+        watch = FakeWatch(callback)
+        self.watches[path] = watch
+        return watch
+
+    def notify(self, path: str):
+        """Deliver the current state of a document or collection to its watch"""
+        path = tuple(path.split("/"))
+        if len(path) % 2:
+            snapshots = FakeCollection(self, path).snapshots()
+        else:
+            snapshots = [FakeSnapshot(FakeDocument(self, path), self.docs.get(path))]
+        self.watches[path].callback(snapshots, [], None)
+
+
+async def _run_db(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+async def _call(method_name, ref, *args):
+    return getattr(ref, method_name)(*args)
+
+
+fake_firestore_client = types.ModuleType("firestore_client")
+fake_firestore_client.db = None
+fake_firestore_client.get_db = lambda: fake_firestore_client.db
+fake_firestore_client.run_db = _run_db
+fake_firestore_client.get_document = lambda ref: _call("get", ref)
+fake_firestore_client.set_document = lambda ref, data: _call("set", ref, data)
+fake_firestore_client.update_document = lambda ref, data: _call("update", ref, data)
+fake_firestore_client.delete_document = lambda ref: _call("delete", ref)
+fake_firestore_client.stream_documents = lambda query: _call("stream", query)
+fake_firestore_client.commit_batch = lambda batch: _call("commit", batch)
+sys.modules["firestore_client"] = fake_firestore_client
+
+fake_bot = types.SimpleNamespace(
+    tree=types.SimpleNamespace(command=lambda **kwargs: lambda f: f),
+    firestore_listener=None,
+)
+import bot  # noqa: F401 - the real package, only bot.bot is replaced
+
+_install("bot.bot", types.ModuleType("bot.bot"))
+sys.modules["bot.bot"].bot = fake_bot
+
+
+@pytest.fixture
+def db():
+    """A fresh fake Firestore behind firestore_client"""
+    fake_firestore_client.db = FakeDb()
+    yield fake_firestore_client.db
+    fake_firestore_client.db = None
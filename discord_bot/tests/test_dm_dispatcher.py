@@ -0,0 +1,167 @@
+import asyncio
+import time
+
+import discord
+import dm_dispatcher
+import pytest
+from config import config
+from dm_dispatcher import (
+    CREATE_DM_ROUTE,
+    FETCH_USER_ROUTE,
+    SEND_DM_ROUTE,
+    DMDispatcher,
+)
+
+
+class FakeDiscordHTTP:
+    """Discord REST stand-in recording calls and raising queued errors"""
+
+    def __init__(self):
+        self.calls = []
+        # (call, id) -> exceptions raised by the next calls, in order
+        self.errors = {}
+
+    async def request(self, call: str, major_id: int, result=None):
+        self.calls.append((call, major_id))
+        errors = self.errors.get((call, major_id))
+        if errors:
+            raise errors.pop(0)
+        return result
+
+
+class FakeChannel:
+    def __init__(self, http: FakeDiscordHTTP, channel_id: int):
+        self.http = http
+        self.id = channel_id
+
+    async def send(self, embed=None):
+        return await self.http.request("send", self.id)
+
+
+class FakeUser:
+    def __init__(self, http: FakeDiscordHTTP, user_id: int):
+        self.http = http
+        self.id = user_id
+        self.dm_channel = None
+
+    async def create_dm(self):
+        channel = FakeChannel(self.http, self.id + 1000)
+        self.dm_channel = await self.http.request("create_dm", self.id, channel)
+        return self.dm_channel
+
+
+class FakeBot:
+    def __init__(self, http: FakeDiscordHTTP):
+        self.http = http
+        self.users = {}
+
+    def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id):
+        user = FakeUser(self.http, user_id)
+        self.users[user_id] = await self.http.request("fetch_user", user_id, user)
+        return user
+
+
+@pytest.fixture
+def http(monkeypatch):
+    monkeypatch.setattr(config, "DM_RATE_PER_SECOND", 1.0)
+    monkeypatch.setattr(config, "DM_BURST", 1)
+    monkeypatch.setattr(config, "DM_GLOBAL_RATE_PER_SECOND", 1000.0)
+    monkeypatch.setattr(config, "DM_MAX_RETRIES", 2)
+    monkeypatch.setattr(dm_dispatcher.random, "uniform", lambda a, b: 0)
+    return FakeDiscordHTTP()
+
+
+def send_all(dispatcher: DMDispatcher, discord_ids: list[str]) -> list[bool]:
+    async def run():
+        try:
+            return await asyncio.gather(
+                *(dispatcher.send(d, embed=None) for d in discord_ids)
+            )
+        finally:
+            dispatcher.close()
+
+    return asyncio.run(run())
+
+
+def test_dms_to_different_users_do_not_share_a_bucket(http):
+    dispatcher = DMDispatcher(FakeBot(http))
+    discord_ids = [str(100 + i) for i in range(12)]
+
+    started = time.monotonic()
+    assert all(send_all(dispatcher, discord_ids))
+
+    # One token per second per bucket: a shared route bucket would take ~35s
+    assert time.monotonic() - started < 1
+    assert len(http.calls) == 3 * len(discord_ids)
+    assert (SEND_DM_ROUTE, 1100) in dispatcher.buckets
+    assert (CREATE_DM_ROUTE, 100) in dispatcher.buckets
+    assert (FETCH_USER_ROUTE, 100) in dispatcher.buckets
+
+
+def test_every_request_takes_a_global_token(http):
+    dispatcher = DMDispatcher(FakeBot(http))
+    tokens = dispatcher.global_bucket.tokens
+
+    send_all(dispatcher, ["100", "101"])
+
+    assert tokens - dispatcher.global_bucket.tokens == pytest.approx(6, abs=0.5)
+
+
+def test_dm_channel_is_opened_once_per_user(http):
+    bot = FakeBot(http)
+    dispatcher = DMDispatcher(bot)
+    send_all(dispatcher, ["100"])
+
+    dispatcher = DMDispatcher(bot)
+    send_all(dispatcher, ["100"])
+
+    assert [call for call, _ in http.calls] == [
+        "fetch_user",
+        "create_dm",
+        "send",
+        "send",
+    ]
+    assert dispatcher.stats["userCacheHits"] == 1
+
+
+def test_rate_limited_sends_are_retried(http, monkeypatch):
+    # Retries take channel tokens too, refill them quickly
+    monkeypatch.setattr(config, "DM_RATE_PER_SECOND", 100.0)
+    http.errors[("send", 1100)] = [discord.RateLimited(0), discord.RateLimited(0)]
+    dispatcher = DMDispatcher(FakeBot(http))
+
+    assert send_all(dispatcher, ["100"]) == [True]
+
+    assert http.calls.count(("send", 1100)) == 3
+    assert dispatcher.stats["retries"] == 2
+
+
+def test_send_fails_after_max_retries(http, monkeypatch):
+    monkeypatch.setattr(config, "DM_RATE_PER_SECOND", 100.0)
+    http.errors[("send", 1100)] = [discord.RateLimited(0) for _ in range(5)]
+    dispatcher = DMDispatcher(FakeBot(http))
+
+    assert send_all(dispatcher, ["100"]) == [False]
+
+    assert http.calls.count(("send", 1100)) == config.DM_MAX_RETRIES + 1
+
+
+def test_server_errors_are_left_to_discord_py(http):
+    http.errors[("send", 1100)] = [discord.HTTPException(503)]
+    dispatcher = DMDispatcher(FakeBot(http))
+
+    assert send_all(dispatcher, ["100"]) == [False]
+
+    assert http.calls.count(("send", 1100)) == 1
+    assert dispatcher.stats == dict(dispatcher.stats, failed=1, retries=0)
+
+
+def test_forbidden_dm_is_not_retried(http):
+    http.errors[("send", 1100)] = [discord.Forbidden(403)]
+    dispatcher = DMDispatcher(FakeBot(http))
+
+    assert send_all(dispatcher, ["100"]) == [False]
+    assert http.calls.count(("send", 1100)) == 1
@@ -0,0 +1,249 @@
+import asyncio
+import threading
+import types
+from datetime import UTC, datetime
+
+import firestore_listener
+import pytest
+from config import config
+from firestore_listener import (
+    COLLECTION_GROUP_MODE,
+    PER_ROOM_MODE,
+    FirestoreListener,
+)
+
+STARTED_AT = datetime(2026, 10, 18, 20, 0, tzinfo=UTC)
+
+
+@pytest.fixture
+def make_listener(db):
+    def make(mode: str) -> FirestoreListener:
+        return FirestoreListener(types.SimpleNamespace(loop=None), mode=mode)
+
+    return make
+
+
+def test_per_room_watch_anchors_on_room_started_at(db, make_listener):
+    db.add("rooms/ROOM01", {"status": "dealt", "startedAt": STARTED_AT})
+    listener = make_listener(PER_ROOM_MODE)
+
+    asyncio.run(listener.start_room_listener("ROOM01"))
+
+    watch = db.watches[("rooms", "ROOM01", "secrets")]
+    assert watch.filters == [(("createdAt", ">", STARTED_AT), {})]
+    assert listener.active_stream_count() == 1
+
+
+def test_per_room_watch_of_undealt_room_has_no_anchor(db, make_listener):
+    db.add("rooms/ROOM01", {"status": "lobby"})
+    listener = make_listener(PER_ROOM_MODE)
+
+    asyncio.run(listener.start_room_listener("ROOM01"))
+
+    assert db.watches[("rooms", "ROOM01", "secrets")].filters == []
+
+
+def test_sweep_does_not_read_rooms_without_a_stream(db, make_listener):
+    listener = make_listener(COLLECTION_GROUP_MODE)
+    for room_id in ["ROOM01", "ROOM02", "ROOM03"]:
+        db.add(f"rooms/{room_id}", {"status": "lobby"})
+        asyncio.run(listener.start_room_listener(room_id))
+
+    asyncio.run(listener.evict_stale_listeners())
+
+    assert db.ops["get"] == 0
+    assert len(listener.active_listeners) == 3
+    assert listener.active_stream_count() == 1
+
+
+def test_sweep_evicts_deleted_per_room_listener(db, make_listener):
+    listener = make_listener(PER_ROOM_MODE)
+    db.add("rooms/ROOM01", {"status": "lobby"})
+    asyncio.run(listener.start_room_listener("ROOM01"))
+    del db.docs[("rooms", "ROOM01")]
+
+    asyncio.run(listener.evict_stale_listeners())
+
+    assert "ROOM01" not in listener.active_listeners
+    assert listener.evictions["deleted"] == 1
+    assert not db.watches[("rooms", "ROOM01", "secrets")].is_active
+
+
+def test_evicted_watches_close_off_the_event_loop(db, make_listener, monkeypatch):
+    async def run_db_in_thread(func, *args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    monkeypatch.setattr(firestore_listener, "run_db", run_db_in_thread)
+    monkeypatch.setattr(config, "LISTENER_MAX_ACTIVE", 1)
+    listener = make_listener(PER_ROOM_MODE)
+    db.add("rooms/ROOM01", {"status": "lobby"})
+    db.add("rooms/ROOM02", {"status": "lobby"})
+
+    async def track_room_then_another():
+        await listener.start_room_listener("ROOM01")
+        closing_threads = []
+        watch_type = type(db.watches[("rooms", "ROOM01", "secrets")])
+        monkeypatch.setattr(
+            watch_type,
+            "unsubscribe",
+            lambda watch: closing_threads.append(threading.current_thread()),
+        )
+        await listener.start_room_listener("ROOM02")
+        return closing_threads
+
+    closing_threads = asyncio.run(track_room_then_another())
+
+    assert list(listener.active_listeners) == ["ROOM02"]
+    assert listener.evictions["lru"] == 1
+    assert len(closing_threads) == 1
+    assert threading.main_thread() not in closing_threads
+
+
+async def look_up_status(db, listener, room_id: str, snapshots: list[str]):
+    """Look up a room's status, delivering the watch's first snapshots meanwhile"""
+    lookup = asyncio.create_task(listener.get_room_status(room_id))
+    while ("rooms", room_id) not in db.watches:
+        await asyncio.sleep(0)
+    for path in snapshots:
+        db.notify(path)
+    return await lookup
+
+
+def test_first_status_lookup_is_served_from_the_watch(db, make_listener):
+    db.add("rooms/ROOM01", {"status": "lobby", "hostUid": "42"})
+    db.add("rooms/ROOM01/players/42", {"name": "host"})
+    listener = make_listener(COLLECTION_GROUP_MODE)
+
+    status = asyncio.run(
+        look_up_status(db, listener, "ROOM01", ["rooms/ROOM01", "rooms/ROOM01/players"])
+    )
+
+    assert status["status"] == "lobby"
+    assert [p["uid"] for p in status["players"]] == ["42"]
+    assert db.ops["get"] == db.ops["stream"] == 0
+    assert listener.room_states.stream_count() == 2
+    # The next lookup is a plain memory hit
+    assert asyncio.run(listener.get_room_status("ROOM01"))["status"] == "lobby"
+    assert db.ops["get"] == db.ops["stream"] == 0
+
+
+def test_status_lookup_of_missing_room_closes_its_watch(db, make_listener):
+    listener = make_listener(COLLECTION_GROUP_MODE)
+
+    status = asyncio.run(look_up_status(db, listener, "GONE99", ["rooms/GONE99"]))
+
+    assert status is None
+    assert db.ops["get"] == 0
+    assert listener.room_states.stream_count() == 0
+    assert not any(watch.is_active for watch in db.watches.values())
+
+
+def test_status_lookup_reads_room_when_snapshots_are_late(
+    db, make_listener, monkeypatch
+):
+    monkeypatch.setattr(config, "ROOM_STATE_LOAD_TIMEOUT_SECONDS", 0.01)
+    db.add("rooms/ROOM01", {"status": "lobby", "hostUid": "42"})
+    listener = make_listener(COLLECTION_GROUP_MODE)
+
+    status = asyncio.run(listener.get_room_status("ROOM01"))
+
+    assert status["status"] == "lobby"
+    assert db.ops["get"] == db.ops["stream"] == 1
+    # The watch stays open and serves later lookups once it loads
+    assert listener.room_states.stream_count() == 2
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, discord_id, embed, created_at=None):
+        self.sent.append(discord_id)
+        return True
+
+
+def seed_deal(db, player_ids: list[str]) -> list[dict]:
+    db.add(
+        "rooms/ROOM01",
+        {"status": "dealt", "startedAt": STARTED_AT, "speakingOrder": player_ids},
+    )
+    secrets = []
+    for i, player_id in enumerate(player_ids):
+        db.add(f"rooms/ROOM01/players/{player_id}", {"name": f"P{i}", "seen": False})
+        secrets.append(
+            {
+                "discordId": player_id,
+                "role": "impostor" if i == 0 else "player",
+                "word": None if i == 0 else "kot",
+                "createdAt": STARTED_AT,
+            }
+        )
+    return secrets
+
+
+def test_deal_costs_one_room_get_and_one_players_stream(db, make_listener):
+    player_ids = [str(100 + i) for i in range(8)]
+    secrets = seed_deal(db, player_ids)
+    listener = make_listener(COLLECTION_GROUP_MODE)
+    listener.dm_dispatcher = FakeDispatcher()
+
+    asyncio.run(listener._deliver_deal("ROOM01", secrets))
+
+    assert sorted(listener.dm_dispatcher.sent) == player_ids
+    assert db.ops["get"] == 1
+    assert db.ops["stream"] == 1
+    assert listener.deal_stats == {"deals": 1, "reads": 1 + len(player_ids)}
+
+
+def test_split_deal_of_tracked_room_is_fetched_once(db, make_listener):
+    secrets = seed_deal(db, ["100", "101", "102", "103"])
+    listener = make_listener(COLLECTION_GROUP_MODE)
+    listener.dm_dispatcher = FakeDispatcher()
+    asyncio.run(listener.start_room_listener("ROOM01"))
+
+    async def deliver_in_two_snapshots():
+        await listener._deliver_deal("ROOM01", secrets[:2])
+        await listener._deliver_deal("ROOM01", secrets[2:])
+
+    asyncio.run(deliver_in_two_snapshots())
+
+    assert db.ops["get"] == 1
+    assert db.ops["stream"] == 1
+    assert listener.deal_stats["deals"] == 2
+
+
+def seen_flags(db) -> dict:
+    return {
+        path[-1]: data["seen"]
+        for path, data in db.docs.items()
+        if path[:3] == ("rooms", "ROOM01", "players")
+    }
+
+
+def test_deal_seen_flags_land_in_one_commit(db, make_listener):
+    secrets = seed_deal(db, ["100", "101", "102", "103"])
+    listener = make_listener(COLLECTION_GROUP_MODE)
+    listener.dm_dispatcher = FakeDispatcher()
+
+    asyncio.run(listener._deliver_deal("ROOM01", secrets))
+
+    assert db.ops["commit"] == 1
+    assert db.ops["write"] == 4
+    assert all(seen_flags(db).values())
+    assert listener.seen_stats == {"batches": 1, "writes": 4}
+
+
+def test_seen_flags_fall_back_per_player_when_one_left(db, make_listener):
+    seed_deal(db, ["100", "101", "102", "103"])
+    listener = make_listener(COLLECTION_GROUP_MODE)
+    for player_id in ["100", "101", "102"]:
+        listener.pending_seen.setdefault("ROOM01", set()).add(player_id)
+    # Player 102 left after the deal was fetched
+    del db.docs[("rooms", "ROOM01", "players", "102")]
+
+    asyncio.run(listener._flush_seen("ROOM01"))
+
+    assert db.ops["commit"] == 1
+    assert seen_flags(db) == {"100": True, "101": True, "103": False}
+    assert ("rooms", "ROOM01", "players", "102") not in db.docs
+    assert listener.seen_stats == {"batches": 0, "writes": 2}
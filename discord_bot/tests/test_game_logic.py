@@ -0,0 +1,151 @@
+import asyncio
+
+import game_logic
+import pytest
+from firestore_client import commit_batch
+
+
+def seed_room(db, players: dict, host: str = "host"):
+    db.add("rooms/ROOM01", {"hostUid": host, "status": "dealt", "allowJoin": True})
+    for player_id, seen in players.items():
+        db.add(f"rooms/ROOM01/players/{player_id}", {"name": player_id, "seen": seen})
+
+
+@pytest.fixture
+def code_stats(monkeypatch):
+    stats = dict.fromkeys(game_logic.room_code_stats, 0)
+    monkeypatch.setattr(game_logic, "room_code_stats", stats)
+    return stats
+
+
+def draw_codes(monkeypatch, codes: list[str]):
+    drawn = iter(codes)
+    monkeypatch.setattr(game_logic, "generate_room_id", lambda: next(drawn))
+
+
+def test_restart_reads_once_and_commits_one_batch(db):
+    seed_room(db, {"host": True, "p1": True, "p2": False})
+
+    asyncio.run(game_logic.restart_game("ROOM01", "host"))
+
+    assert db.ops["get"] == 1
+    assert db.ops["stream"] == 1
+    assert db.ops["commit"] == 1
+    # Two seen resets (p2 is already unseen) plus the room status
+    assert db.ops["write"] == 3
+    assert db.docs[("rooms", "ROOM01")]["status"] == "started"
+    assert not any(
+        data["seen"]
+        for path, data in db.docs.items()
+        if path[:3] == ("rooms", "ROOM01", "players")
+    )
+
+
+def test_restart_skips_players_already_unseen(db):
+    seed_room(db, {"host": False, "p1": False, "p2": False})
+
+    asyncio.run(game_logic.restart_game("ROOM01", "host"))
+
+    assert db.ops["commit"] == 1
+    assert db.ops["write"] == 1
+
+
+def test_restart_by_non_host_writes_nothing(db):
+    seed_room(db, {"host": True, "p1": True, "p2": True})
+
+    with pytest.raises(ValueError):
+        asyncio.run(game_logic.restart_game("ROOM01", "p1"))
+
+    assert db.ops["commit"] == 0
+    assert db.ops["write"] == 0
+
+
+@pytest.mark.parametrize(
+    "room, reason",
+    [
+        ({"status": "dealt", "allowJoin": True}, "already started"),
+        ({"status": "lobby", "allowJoin": False}, "not accepting"),
+    ],
+)
+def test_rejected_join_writes_no_player(db, room, reason):
+    db.add("rooms/ROOM01", {"hostUid": "host", **room})
+
+    with pytest.raises(ValueError, match=reason):
+        asyncio.run(game_logic.join_room("ROOM01", "42", "Ala"))
+
+    assert ("rooms", "ROOM01", "players", "42") not in db.docs
+    assert db.ops["commit"] == 0
+    assert db.ops["write"] == 0
+
+
+def test_join_checks_room_and_adds_player_in_one_commit(db):
+    db.add("rooms/ROOM01", {"hostUid": "host", "status": "lobby", "allowJoin": True})
+
+    asyncio.run(game_logic.join_room("ROOM01", "42", "Ala"))
+
+    player = db.docs[("rooms", "ROOM01", "players", "42")]
+    assert player["name"] == "Ala" and player["discordId"] == "42"
+    assert db.ops["get"] == 1
+    assert db.ops["commit"] == 1
+
+
+def test_create_room_commits_room_and_host_together(db, monkeypatch, code_stats):
+    draw_codes(monkeypatch, ["ROOM01"])
+
+    room_id = asyncio.run(game_logic.create_room("42", "Ala", channel_id="7"))
+
+    assert room_id == "ROOM01"
+    assert db.docs[("rooms", "ROOM01")]["hostUid"] == "42"
+    assert db.docs[("rooms", "ROOM01", "players", "42")]["isHost"] is True
+    assert db.ops["commit"] == 1
+    assert db.ops["write"] == 2
+    assert db.ops["get"] == 0
+
+
+def test_create_room_never_overwrites_a_taken_code(db, monkeypatch, code_stats):
+    db.add("rooms/ROOM01", {"hostUid": "host", "status": "dealt"})
+    draw_codes(monkeypatch, ["ROOM01", "ROOM02"])
+
+    room_id = asyncio.run(game_logic.create_room("42", "Ala"))
+
+    assert room_id == "ROOM02"
+    assert db.docs[("rooms", "ROOM01")] == {"hostUid": "host", "status": "dealt"}
+    # The failed batch took the host player down with the room
+    assert ("rooms", "ROOM01", "players", "42") not in db.docs
+    assert ("rooms", "ROOM02", "players", "42") in db.docs
+
+
+async def create_lobby(room_ref):
+    batch = game_logic.get_db().batch()
+    batch.create(room_ref, {"status": "lobby"})
+    await commit_batch(batch)
+
+
+def test_taken_code_counts_a_collision_and_draws_again(db, monkeypatch, code_stats):
+    db.add("rooms/TAKEN1", {"status": "dealt"})
+    draw_codes(monkeypatch, ["TAKEN1", "FRESH1"])
+
+    room_id = asyncio.run(game_logic.allocate_room_code(create_lobby))
+
+    assert room_id == "FRESH1"
+    assert db.ops["get"] == 0
+    assert db.docs[("rooms", "TAKEN1")] == {"status": "dealt"}
+    assert code_stats["collisions"] == 1
+    stats = game_logic.get_room_code_stats()
+    assert stats["allocations"] == 1
+    assert stats["collisions"] == 1
+    assert stats["collisionRate"] == 0.5
+
+
+def test_allocation_gives_up_after_max_attempts(db, monkeypatch, code_stats):
+    db.add("rooms/TAKEN1", {"status": "dealt"})
+    draw_codes(monkeypatch, ["TAKEN1"] * game_logic.ROOM_CODE_MAX_ATTEMPTS)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(game_logic.allocate_room_code(create_lobby))
+
+    assert db.ops["get"] == 0
+    assert db.ops["commit"] == game_logic.ROOM_CODE_MAX_ATTEMPTS
+    assert code_stats["collisions"] == game_logic.ROOM_CODE_MAX_ATTEMPTS
+    assert code_stats["failures"] == 1
+    assert code_stats["allocations"] == 0
@@ -0,0 +1,67 @@
+import asyncio
+
+from room_state import RoomStateCache
+
+
+def load(db, room_id: str):
+    db.notify(f"rooms/{room_id}")
+    db.notify(f"rooms/{room_id}/players")
+
+
+def test_status_served_from_memory_once_watched(db):
+    db.add("rooms/ROOM01", {"status": "lobby", "hostUid": "42"})
+    db.add("rooms/ROOM01/players/42", {"name": "host"})
+    cache = RoomStateCache(db)
+
+    cache.watch("ROOM01")
+    assert cache.get_status("ROOM01") == (False, None)
+    load(db, "ROOM01")
+
+    hit, status = cache.get_status("ROOM01")
+    assert hit and status["status"] == "lobby"
+    assert [p["uid"] for p in status["players"]] == ["42"]
+    assert cache.stream_count() == 2
+    assert db.ops["get"] == db.ops["stream"] == 0
+
+
+def test_stale_rooms_drop_deleted_then_idle_then_overflow(db):
+    db.add("rooms/ROOM01", {"status": "lobby"})
+    cache = RoomStateCache(db)
+    for room_id in ["DEAD01", "OLD001", "ROOM01", "ROOM02", "ROOM03"]:
+        cache.watch(room_id)
+    load(db, "DEAD01")
+    cache.last_access["OLD001"] -= 3600
+    # A lookup makes ROOM01 the most recently used room
+    load(db, "ROOM01")
+    cache.get_status("ROOM01")
+
+    assert cache.stale_rooms(max_idle=900, max_watched=2) == [
+        "DEAD01",
+        "OLD001",
+        "ROOM02",
+    ]
+
+
+def test_unwatch_closes_both_streams(db):
+    cache = RoomStateCache(db)
+    cache.watch("ROOM01")
+
+    cache.unwatch("ROOM01")
+
+    assert not any(watch.is_active for watch in db.watches.values())
+    assert cache.stream_count() == 0
+    assert cache.get_stats()["rooms"] == 0
+
+
+def test_unwatch_releases_a_lookup_waiting_for_snapshots(db):
+    cache = RoomStateCache(db)
+    cache.watch("ROOM01")
+
+    async def unwatch_while_waiting():
+        waiting = asyncio.create_task(cache.wait_loaded("ROOM01", timeout=5))
+        await asyncio.sleep(0)
+        cache.unwatch("ROOM01")
+        return await waiting
+
+    assert asyncio.run(unwatch_while_waiting()) is False
+    assert cache._load_waiters == {}
@@ -0,0 +1,101 @@
+import asyncio
+import types
+
+import game_logic
+import pytest
+import user_sessions
+from bot import commands
+from bot.bot import bot
+
+
+class FakeListener:
+    """Listener stand-in reading room status straight from Firestore"""
+
+    def __init__(self):
+        self.tracked = []
+
+    async def start_room_listener(self, room_id):
+        self.tracked.append(room_id)
+
+    async def get_room_status(self, room_id):
+        return await game_logic.get_room_status(room_id)
+
+
+class FakeInteraction:
+    def __init__(self, user_id: int):
+        self.user = types.SimpleNamespace(id=user_id)
+        self.sent = []
+        self.response = types.SimpleNamespace(defer=self._defer)
+        self.followup = types.SimpleNamespace(send=self._send)
+
+    async def _defer(self, *args, **kwargs):
+        pass
+
+    async def _send(self, content=None, **kwargs):
+        self.sent.append(content)
+
+
+@pytest.fixture(autouse=True)
+def sessions(db):
+    user_sessions._session_cache.clear()
+    for key in user_sessions.cache_stats:
+        user_sessions.cache_stats[key] = 0
+    bot.firestore_listener = FakeListener()
+    yield
+    bot.firestore_listener = None
+
+
+def cleanup_room(db, room_id: str, user_id: str):
+    """What cleanup_old_rooms and cleanup_discord_sessions do, without the bot knowing"""
+    for path in [p for p in db.docs if p[:2] == ("rooms", room_id)]:
+        del db.docs[path]
+    db.docs.pop(("discord_user_sessions", user_id), None)
+
+
+def test_set_user_room_writes_through(db):
+    asyncio.run(user_sessions.set_user_room("42", " room01 "))
+
+    assert db.docs[("discord_user_sessions", "42")] == {"current_room": "ROOM01"}
+    assert asyncio.run(user_sessions.get_user_room("42")) == "ROOM01"
+    assert db.ops["get"] == 0
+    assert user_sessions.cache_stats["hits"] == 1
+
+
+def test_status_invalidates_session_deleted_behind_the_bot(db):
+    db.add("rooms/ROOM01", {"hostUid": "42", "status": "lobby"})
+    asyncio.run(user_sessions.set_user_room("42", "ROOM01"))
+    cleanup_room(db, "ROOM01", "42")
+
+    interaction = FakeInteraction(42)
+    asyncio.run(commands.status_command(interaction))
+
+    assert interaction.sent == ["❌ Pokój ROOM01 nie istnieje!"]
+    assert "42" not in user_sessions._session_cache
+    # The next lookup re-reads the (deleted) session instead of the stale room
+    assert asyncio.run(user_sessions.get_user_room("42")) is None
+    assert user_sessions.cache_stats["misses"] == 1
+
+
+def test_start_invalidates_session_deleted_behind_the_bot(db):
+    db.add("rooms/ROOM01", {"hostUid": "42", "status": "lobby"})
+    asyncio.run(user_sessions.set_user_room("42", "ROOM01"))
+    cleanup_room(db, "ROOM01", "42")
+
+    interaction = FakeInteraction(42)
+    asyncio.run(commands.start_command(interaction))
+
+    assert interaction.sent == ["❌ Room ROOM01 does not exist"]
+    assert "42" not in user_sessions._session_cache
+    assert asyncio.run(user_sessions.get_user_room("42")) is None
+    assert db.ops["commit"] == 0
+
+
+def test_explicit_code_keeps_remembered_room(db):
+    db.add("rooms/ROOM01", {"hostUid": "42", "status": "lobby"})
+    asyncio.run(user_sessions.set_user_room("42", "ROOM01"))
+
+    interaction = FakeInteraction(42)
+    asyncio.run(commands.status_command(interaction, code="gone99"))
+
+    assert interaction.sent == ["❌ Pokój GONE99 nie istnieje!"]
+    assert asyncio.run(user_sessions.get_user_room("42")) == "ROOM01"
@@ -1,6 +1,45 @@
-from firestore_client import get_db
+import time
+from collections import OrderedDict
+
+from config import config
+from firestore_client import delete_document, get_db, get_document, set_document
 from loguru import logger
 
+# user_id -> (room code or None, expiry on the monotonic clock), in LRU order.
+# Writes through on set/clear; sessions deleted by the cleanup functions are
+# dropped by invalidate_user_room when the remembered room turns out missing,
+# or at the latest when the entry expires.
+_session_cache = OrderedDict()
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _cache_put(user_id: str, room_code: str | None):
+    _session_cache[user_id] = (
+        room_code,
+        time.monotonic() + config.SESSION_CACHE_TTL_SECONDS,
+    )
+    _session_cache.move_to_end(user_id)
+    while len(_session_cache) > config.SESSION_CACHE_MAX_SIZE:
+        _session_cache.popitem(last=False)
+        cache_stats["evictions"] += 1
+
+
+def invalidate_user_room(user_id: str):
+    """
+    Forget the cached room for a Discord user, e.g. when the room no longer exists
+    
+    Parameters
+    ----------
+    user_id : str
+        Discord user ID
+    """
+    _session_cache.pop(user_id, None)
+
+
+def get_cache_stats() -> dict:
+    """Session cache counters and size"""
+    return dict(cache_stats, size=len(_session_cache))
+
 
 async def set_user_room(user_id: str, room_code: str):
     """
@@ -15,9 +54,12 @@ async def set_user_room(user_id: str, room_code: str):
     """
     try:
         db = get_db()
-        db.collection("discord_user_sessions").document(user_id).set({
-            "current_room": room_code.upper()
-        })
+        room_code = room_code.strip().upper()
+        await set_document(
+            db.collection("discord_user_sessions").document(user_id),
+            {"current_room": room_code},
+        )
+        _cache_put(user_id, room_code)
         logger.info(f"Stored room {room_code} for user {user_id}")
     except Exception as e:
         logger.error(f"Failed to store user room: {e}")
@@ -37,15 +79,23 @@ async def get_user_room(user_id: str) -> str | None:
     str | None
         Room code if found, None otherwise
     """
+    cached = _session_cache.get(user_id)
+    if cached and cached[1] > time.monotonic():
+        _session_cache.move_to_end(user_id)
+        cache_stats["hits"] += 1
+        return cached[0]
+
+    cache_stats["misses"] += 1
     try:
         db = get_db()
-        doc = db.collection("discord_user_sessions").document(user_id).get()
-        if doc.exists:
-            data = doc.to_dict()
-            room_code = data.get("current_room")
+        doc = await get_document(
+            db.collection("discord_user_sessions").document(user_id)
+        )
+        room_code = doc.to_dict().get("current_room") if doc.exists else None
+        _cache_put(user_id, room_code)
+        if room_code:
             logger.info(f"Retrieved room {room_code} for user {user_id}")
-            return room_code
-        return None
+        return room_code
     except Exception as e:
         logger.error(f"Failed to get user room: {e}")
         return None
@@ -62,7 +112,10 @@ async def clear_user_room(user_id: str):
     """
     try:
         db = get_db()
-        db.collection("discord_user_sessions").document(user_id).delete()
+        await delete_document(
+            db.collection("discord_user_sessions").document(user_id)
+        )
+        _cache_put(user_id, None)
         logger.info(f"Cleared room for user {user_id}")
     except Exception as e:
         logger.error(f"Failed to clear user room: {e}")
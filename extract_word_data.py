@@ -4,39 +4,165 @@ Extract semantic data from Polish WordNet for game words.
 Creates an enhanced JSON file with word metadata including hypernyms, collocations, fuzzy synonyms, and hints.
 """
 
+import argparse
+import functools
+import hashlib
 import json
+import multiprocessing
+import os
+import pickle
+import time
 from collections import defaultdict
 from typing import Any
 
-import plwordnet
+PLWORDNET_XML = "plwordnet_data/plwordnet_4_2/plwordnet_4_2.xml"
+EXTRACT_CHUNK_SIZE = 100
 
-# Load plWordNet
-print("Loading plWordNet database...")
-wn = plwordnet.load("plwordnet_data/plwordnet_4_2/plwordnet_4_2.xml")
-print(f"✅ Loaded {len(wn.lexical_units)} lexical units\n")
+# Feature extraction parameters; changing any of them (or the plWordNet XML)
+# invalidates the words reused by an incremental build (see
+# extraction_params_hash())
+EXTRACTION_PARAMS = {
+    "fuzzy_max_count": 3,
+    "hypernym_max_count": 3,
+    "preferred_level": 3,
+    "collocation_max_count": 5,
+}
 
+# Loaded on first use, see get_relation_index()
+_relation_index = None
 
-def get_fuzzy_synonyms(lexical_unit, wn, max_count: int = 3) -> list[str]:
-    """
-    Get fuzzy synonyms - similar but not exact matches.
-    These provide helpful hints without being too revealing.
+
+# Lexical relation kinds used for hints, matched on lowercased predicate names
+RELATION_KINDS = {
+    "fuzzynimia": "fuzzy",
+    "kolokacyjność": "collocation",
+    "określnik": "collocation",
+}
+
+
+class RelationIndex:
     """
-    fuzzy_synonyms = []
+    Flat view of the plWordNet subset the feature extractors use.
 
-    for subj, pred, obj in wn.lexical_relations_where(subject=lexical_unit):
-        pred_name = pred.name.lower()
-        base_lemma = obj.name.split(".")[0]
+    Built once from the parsed graph by ``from_wordnet``: lexical unit ids per
+    lowercased lemma, the synset and the relations grouped by kind (see
+    ``RELATION_KINDS``) of each unit, and the direct hypernyms and first base
+    lemma of each synset. It only holds dicts of ids and strings, so it pickles
+    without recursing through the graph (see ``load_relation_index``).
+    """
 
-        # Fuzzy synonyms - similar but not exact
-        if "fuzzynimia" in pred_name:
-            if base_lemma not in fuzzy_synonyms:
-                fuzzy_synonyms.append(base_lemma)
+    def __init__(
+        self,
+        lemma_units: dict[str, list[int]],
+        unit_synsets: dict[int, int | None],
+        unit_relations: dict[int, dict[str, list[str]]],
+        synset_hypernyms: dict[int, list[int]],
+        synset_lemmas: dict[int, str],
+    ):
+        self.lemma_units = lemma_units
+        self.unit_synsets = unit_synsets
+        self.unit_relations = unit_relations
+        self.synset_hypernyms = synset_hypernyms
+        self.synset_lemmas = synset_lemmas
+
+    @classmethod
+    def from_wordnet(cls, wn) -> "RelationIndex":
+        """Flatten a parsed plWordNet graph."""
+        predicate_kinds = {
+            predicate.id: next(
+                (
+                    kind
+                    for marker, kind in RELATION_KINDS.items()
+                    if marker in predicate.name.lower()
+                ),
+                None,
+            )
+            for predicate in wn.relation_types.values()
+        }
+
+        unit_relations = {}
+        for unit_id in list(wn.lexical_relations_s):
+            grouped = defaultdict(list)
+            for subj, pred, obj in wn.lexical_relations_where(subject=unit_id):
+                kind = predicate_kinds[pred.id]
+                base_lemma = obj.name.split(".")[0]
+                if kind and base_lemma not in grouped[kind]:
+                    grouped[kind].append(base_lemma)
+            if grouped:
+                unit_relations[unit_id] = dict(grouped)
+
+        synset_hypernyms = {}
+        for synset in wn.synsets.values():
+            hypernyms = [h.id for h in wn.hypernyms(synset)]
+            if hypernyms:
+                synset_hypernyms[synset.id] = hypernyms
+
+        return cls(
+            lemma_units={
+                name: list(unit_ids)
+                for name, unit_ids in wn.lexical_units_by_name.items()
+            },
+            unit_synsets={
+                lu.id: lu.synset.id if lu.synset else None
+                for lu in wn.lexical_units.values()
+            },
+            unit_relations=unit_relations,
+            synset_hypernyms=synset_hypernyms,
+            synset_lemmas={
+                synset.id: synset.lexical_units[0].name.split(".")[0]
+                for synset in wn.synsets.values()
+                if synset.lexical_units
+            },
+        )
 
-    return fuzzy_synonyms[:max_count]
+    def find(self, word: str) -> list[int]:
+        """Lexical unit ids of a word, most common meaning first"""
+        return self.lemma_units.get(word.lower(), [])
+
+    def unit_synset(self, unit_id: int) -> int | None:
+        """Synset id of a lexical unit"""
+        return self.unit_synsets.get(unit_id)
+
+    def synset_lemma(self, synset_id: int) -> str | None:
+        """Base lemma of a synset's first lexical unit"""
+        return self.synset_lemmas.get(synset_id)
+
+    def relations(self, unit_id: int) -> dict[str, list[str]]:
+        """Unique base lemmas related to the lexical unit, by relation kind"""
+        return self.unit_relations.get(unit_id, {})
+
+    def hypernyms(self, synset_id: int) -> list[int]:
+        """Direct hypernyms of a synset"""
+        return self.synset_hypernyms.get(synset_id, [])
+
+    def hypernym_levels(self, synset_id: int, depth: int) -> list[list[int]]:
+        """
+        Hypernym hierarchy levels (0=synset, 1=direct hypernyms, 2=2 up, etc.),
+        stopping at ``depth`` levels above the synset or at the root.
+        """
+        levels = [[synset_id]]
+        for _ in range(depth):
+            next_level = []
+            for syn in levels[-1]:
+                next_level.extend(self.hypernyms(syn))
+            if not next_level:
+                break
+            levels.append(next_level)
+        return levels
+
+
+def get_fuzzy_synonyms(
+    lexical_unit, relations: RelationIndex, max_count: int = 3
+) -> list[str]:
+    """
+    Get fuzzy synonyms - similar but not exact matches.
+    These provide helpful hints without being too revealing.
+    """
+    return relations.relations(lexical_unit).get("fuzzy", [])[:max_count]
 
 
 def get_hypernym_words(
-    synset, wn, max_count: int = 3, preferred_level: int = 3
+    synset, relations: RelationIndex, max_count: int = 3, preferred_level: int = 3
 ) -> list[str]:
     """
     Get hypernyms from preferred_level and fill the rest going DOWN the path.
@@ -54,16 +180,7 @@ def get_hypernym_words(
     """
     hypernym_words = []
 
-    # Build hypernym hierarchy levels (0=synset, 1=direct hypernym, 2=2 up, etc.)
-    levels = [[synset]]
-    for _ in range(preferred_level + 1):
-        current_level = levels[-1]
-        next_level = []
-        for syn in current_level:
-            next_level.extend(wn.hypernyms(syn))
-        if not next_level:
-            break
-        levels.append(next_level)
+    levels = relations.hypernym_levels(synset, preferred_level + 1)
 
     # Get hypernyms starting from preferred_level and going DOWN
     # This gives: most abstract → less abstract → most specific
@@ -76,32 +193,21 @@ def get_hypernym_words(
                 if len(hypernym_words) >= max_count:
                     break
 
-                if h.lexical_units:
-                    lu = next(iter(h.lexical_units))
-                    base_lemma = lu.name.split(".")[0]
-                    if base_lemma not in hypernym_words:
-                        hypernym_words.append(base_lemma)
+                base_lemma = relations.synset_lemma(h)
+                if base_lemma and base_lemma not in hypernym_words:
+                    hypernym_words.append(base_lemma)
 
     return hypernym_words[:max_count]
 
 
-def get_collocations(lexical_unit, wn, max_count: int = 5) -> list[str]:
+def get_collocations(
+    lexical_unit, relations: RelationIndex, max_count: int = 5
+) -> list[str]:
     """
     Get only collocations (words that commonly appear together) and modifiers.
     These provide contextual hints without being too revealing.
     """
-    collocations = []
-
-    for subj, pred, obj in wn.lexical_relations_where(subject=lexical_unit):
-        pred_name = pred.name.lower()
-        base_lemma = obj.name.split(".")[0]
-
-        # Only include collocations and modifiers
-        if "kolokacyjność" in pred_name or "określnik" in pred_name:
-            if base_lemma not in collocations and len(collocations) < max_count:
-                collocations.append(base_lemma)
-
-    return collocations
+    return relations.relations(lexical_unit).get("collocation", [])[:max_count]
 
 
 def generate_hints(
@@ -149,21 +255,30 @@ def assess_difficulty(word: str, collocations: list[str], hypernyms: list[str])
     return base_difficulty
 
 
-def extract_word_data(word: str, wn) -> dict[str, Any] | None:
+def extract_word_data(word: str, relations: RelationIndex) -> dict[str, Any] | None:
     """Extract all semantic data for a word from WordNet."""
-    lexical_units = wn.find(word)
+    lexical_units = relations.find(word)
 
     if not lexical_units:
         return None
 
     # Use the first (most common) lexical unit
     lu = lexical_units[0]
-    synset = lu.synset
+    synset = relations.unit_synset(lu)
 
     # Extract data
-    fuzzy_synonyms = get_fuzzy_synonyms(lu, wn)
-    hypernyms = get_hypernym_words(synset, wn)
-    collocations = get_collocations(lu, wn)
+    fuzzy_synonyms = get_fuzzy_synonyms(
+        lu, relations, EXTRACTION_PARAMS["fuzzy_max_count"]
+    )
+    hypernyms = get_hypernym_words(
+        synset,
+        relations,
+        EXTRACTION_PARAMS["hypernym_max_count"],
+        EXTRACTION_PARAMS["preferred_level"],
+    )
+    collocations = get_collocations(
+        lu, relations, EXTRACTION_PARAMS["collocation_max_count"]
+    )
 
     # Generate hints (using fuzzy synonyms, hypernyms, and collocations)
     hints = generate_hints(fuzzy_synonyms, hypernyms, collocations)
@@ -186,57 +301,366 @@ def extract_word_data(word: str, wn) -> dict[str, Any] | None:
     }
 
 
-def process_word_list(words: list[str], output_file: str = "enhanced_words.json"):
-    """Process a list of words and create enhanced JSON file."""
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def wordnet_sha256(xml_path: str = PLWORDNET_XML) -> str:
+    """Hex SHA-256 of the plWordNet XML, hashed once per process."""
+    return file_sha256(xml_path)
+
+
+def load_relation_index(xml_path: str = PLWORDNET_XML) -> RelationIndex:
+    """
+    Load the relation index, going through a pickled copy of it.
+
+    Only the flat ``RelationIndex`` is cached, never the parsed graph. The
+    cache sits next to the XML as ``<xml>.<sha256 prefix>.index.pickle``, so a
+    changed XML gets a new cache file and never loads a stale index. Older
+    cache files for the same XML are removed when a new one is written.
+    """
+    sha = wordnet_sha256(xml_path)
+    cache_path = f"{xml_path}.{sha[:16]}.index.pickle"
+
+    if os.path.exists(cache_path):
+        print("Loading plWordNet index from cache...")
+        try:
+            with open(cache_path, "rb") as f:
+                relations = RelationIndex(**pickle.load(f))
+            print(f"✅ Loaded {len(relations.unit_synsets)} lexical units\n")
+            return relations
+        except (pickle.UnpicklingError, EOFError, TypeError) as e:
+            print(f"⚠️ Ignoring unreadable cache {cache_path}: {e}")
+
+    import plwordnet
+
+    print("Loading plWordNet database...")
+    wn = plwordnet.load(xml_path)
+    print(f"✅ Loaded {len(wn.lexical_units)} lexical units\n")
+    relations = RelationIndex.from_wordnet(wn)
+
+    xml_dir, xml_name = os.path.split(xml_path)
+    for name in os.listdir(xml_dir or "."):
+        if name.startswith(f"{xml_name}.") and name.endswith(".pickle"):
+            os.remove(os.path.join(xml_dir, name))
+
+    with open(f"{cache_path}.tmp", "wb") as f:
+        pickle.dump(vars(relations), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{cache_path}.tmp", cache_path)
+    print(f"💾 Cached relation index to {cache_path}")
+
+    return relations
+
+
+def get_relation_index() -> RelationIndex:
+    """Relation index over plWordNet, loaded on first use."""
+    global _relation_index
+    if _relation_index is None:
+        _relation_index = load_relation_index()
+    return _relation_index
+
+
+def extract_chunk(words: list[str]) -> list[tuple[str, dict[str, Any] | None]]:
+    """Extract a chunk of words in a worker process, using the worker's relation index."""
+    relations = get_relation_index()
+    return [(word, extract_word_data(word, relations)) for word in words]
+
+
+def load_checkpoint(checkpoint_file: str) -> dict[str, dict[str, Any] | None]:
+    """
+    Load the results of an interrupted run.
+
+    The checkpoint is a JSON Lines file with one ``{"word": ..., "data": ...}``
+    entry per processed word; a truncated last line (killed mid-write) is ignored.
+    """
+    done = {}
+    if not os.path.exists(checkpoint_file):
+        return done
+
+    with open(checkpoint_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            done[entry["word"]] = entry["data"]
+
+    return done
+
+
+def extraction_params_hash(xml_sha: str) -> str:
+    """Hex SHA-256 of the extraction parameters and the plWordNet XML hash."""
+    params = json.dumps(
+        {"params": EXTRACTION_PARAMS, "plwordnet_sha256": xml_sha}, sort_keys=True
+    )
+    return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+
+def load_previous_build(
+    output_file: str, params_hash: str
+) -> dict[str, dict[str, Any] | None]:
+    """
+    Load the results of the last build, for an incremental rebuild.
+
+    Returns an empty dict when there is no previous build or it was made with
+    different extraction parameters or plWordNet XML. Words that were not found
+    map to None.
+    """
+    if not os.path.exists(output_file):
+        return {}
+
+    if output_file.endswith(".jsonl"):
+        with open(output_file, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}").get("metadata", {})
+            if header.get("params_hash") != params_hash:
+                return {}
+
+            results = {}
+            footer = None
+            for line in f:
+                entry = json.loads(line)
+                if "footer" in entry:
+                    footer = entry["footer"]
+                else:
+                    results[entry["word"]] = entry
+
+        # No footer means the file was cut short, rebuild it from scratch
+        if footer is None:
+            return {}
+        results.update({word: None for word in footer.get("not_found", [])})
+        return results
+
+    with open(output_file, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+
+    metadata = previous.get("metadata", {})
+    if metadata.get("params_hash") != params_hash:
+        return {}
+
+    results = {word: None for word in metadata.get("not_found", [])}
+    results.update({w["word"]: w for w in previous.get("words", [])})
+    return results
+
+
+def write_output(
+    output_file: str,
+    words: list[str],
+    results: dict[str, dict[str, Any] | None],
+    params_hash: str,
+) -> tuple[int, list[str], dict[str, int]]:
+    """
+    Write the enhanced corpus, as JSON or as JSON Lines (``.jsonl`` files).
+
+    The JSON Lines format is written one word at a time: a header line
+    ``{"metadata": {...}}``, one line per word, and a footer line
+    ``{"footer": {...}}`` with the totals only known at the end. Readers can
+    stream it line by line. The file is written under a temporary name and
+    moved into place, so readers never see a partial corpus.
+
+    Returns
+    -------
+    tuple[int, list[str], dict[str, int]]
+        Number of words written, words not found, difficulty distribution
+    """
+    jsonl = output_file.endswith(".jsonl")
     enhanced_words = []
     not_found = []
+    difficulty_counts = defaultdict(int)
+    tmp_file = f"{output_file}.tmp"
+
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        if jsonl:
+            header = {"source": "plWordNet 4.2", "params_hash": params_hash}
+            f.write(json.dumps({"metadata": header}, ensure_ascii=False) + "\n")
+
+        for word in words:
+            word_data = results.get(word)
+            if not word_data:
+                not_found.append(word)
+                continue
+
+            difficulty_counts[word_data["difficulty"]] += 1
+            if jsonl:
+                f.write(json.dumps(word_data, ensure_ascii=False) + "\n")
+            else:
+                enhanced_words.append(word_data)
+
+        enhanced_count = len(words) - len(not_found)
+        totals = {
+            "total_words": enhanced_count,
+            "not_found_count": len(not_found),
+            "not_found": not_found,
+        }
 
-    print(f"Processing {len(words)} words...")
+        if jsonl:
+            f.write(json.dumps({"footer": totals}, ensure_ascii=False) + "\n")
+        else:
+            # Create output structure
+            output = {
+                "metadata": {
+                    "total_words": enhanced_count,
+                    "source": "plWordNet 4.2",
+                    "not_found_count": len(not_found),
+                    "not_found": not_found,
+                    "params_hash": params_hash,
+                },
+                "words": enhanced_words,
+            }
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+    os.replace(tmp_file, output_file)
+    return enhanced_count, not_found, difficulty_counts
+
+
+def extract_pending(
+    chunks: list[list[str]],
+    results: dict[str, dict[str, Any] | None],
+    checkpoint_file: str,
+    workers: int,
+):
+    """Extract chunks of words on a process pool, checkpointing every chunk."""
+    total = sum(len(chunk) for chunk in chunks)
+    started = time.perf_counter()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    if context.get_start_method() == "fork":
+        get_relation_index()
+
+    with (
+        context.Pool(workers) as pool,
+        open(checkpoint_file, "a", encoding="utf-8") as checkpoint,
+    ):
+        processed = 0
+        for chunk_results in pool.imap_unordered(extract_chunk, chunks):
+            for word, word_data in chunk_results:
+                results[word] = word_data
+                checkpoint.write(
+                    json.dumps({"word": word, "data": word_data}, ensure_ascii=False)
+                    + "\n"
+                )
+            checkpoint.flush()
+
+            processed += len(chunk_results)
+            elapsed = time.perf_counter() - started
+            print(
+                f"  Processed {processed}/{total} words "
+                f"({processed / elapsed:.1f} words/s)..."
+            )
+
+
+def process_word_list(
+    words: list[str],
+    output_file: str = "enhanced_words.json",
+    workers: int | None = None,
+    chunk_size: int = EXTRACT_CHUNK_SIZE,
+    incremental: bool = True,
+):
+    """
+    Process a list of words and create enhanced JSON file.
 
-    for i, word in enumerate(words, 1):
-        if i % 10 == 0:
-            print(f"  Processed {i}/{len(words)} words...")
+    A ``.jsonl`` output file is written in the streaming JSON Lines format
+    (see ``write_output``), anything else as a single JSON document.
 
-        word_data = extract_word_data(word, wn)
+    Incremental builds reuse the words of the existing output file when it was
+    built with the same ``EXTRACTION_PARAMS`` from the same plWordNet XML:
+    only words added to the list are extracted and words removed from it are
+    dropped. The output is sorted by word, so rebuilding an unchanged list
+    produces an identical file.
 
-        if word_data:
-            enhanced_words.append(word_data)
-        else:
-            not_found.append(word)
+    Words are extracted in chunks by a pool of worker processes. On platforms
+    with ``fork`` the relation index is loaded once here and shared by the workers,
+    elsewhere each worker loads it (from the cache) on its first chunk.
+    Every finished chunk is appended to a
+    ``<output_file>.<params hash>.partial`` checkpoint, so an interrupted run
+    resumes where it stopped; the checkpoint is removed once the output file
+    is written.
 
-    # Create output structure
-    output = {
-        "metadata": {
-            "total_words": len(enhanced_words),
-            "source": "plWordNet 4.2",
-            "not_found_count": len(not_found),
-        },
-        "words": enhanced_words,
-    }
+    Parameters
+    ----------
+    words : list[str]
+        Words to extract
+    output_file : str
+        Path of the enhanced JSON (or JSON Lines) file to write
+    workers : int | None
+        Number of worker processes, defaults to the CPU count
+    chunk_size : int
+        Words per task sent to a worker
+    incremental : bool
+        Reuse unchanged words from the existing output file
+    """
+    words = sorted(set(words))
+    params_hash = extraction_params_hash(wordnet_sha256())
+    checkpoint_file = f"{output_file}.{params_hash[:12]}.partial"
+
+    previous = load_previous_build(output_file, params_hash) if incremental else {}
+    checkpointed = load_checkpoint(checkpoint_file)
+    results = {word: previous[word] for word in words if word in previous}
+    results.update(checkpointed)
+
+    pending = [word for word in words if word not in results]
+    chunks = [pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    print(f"Processing {len(words)} words with {workers} worker(s)...")
+    if previous:
+        removed = len(previous.keys() - set(words))
+        print(
+            f"  Incremental build: {len(pending)} new, {removed} removed, "
+            f"{len(words) - len(pending)} reused"
+        )
+    if checkpointed:
+        print(f"  Resuming from checkpoint: {len(checkpointed)} words already done")
 
-    # Save to JSON
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    started = time.perf_counter()
+    if chunks:
+        extract_pending(chunks, results, checkpoint_file, workers)
+    elapsed = time.perf_counter() - started
 
-    print(f"\n✅ Successfully processed {len(enhanced_words)} words")
+    enhanced_count, not_found, difficulty_counts = write_output(
+        output_file, words, results, params_hash
+    )
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+    print(f"\n✅ Successfully processed {enhanced_count} words")
     print(f"❌ Could not find {len(not_found)} words in WordNet")
     if not_found:
         print(
             f"   Not found: {', '.join(not_found[:10])}{'...' if len(not_found) > 10 else ''}"
         )
     print(f"📄 Saved to: {output_file}")
+    print(
+        f"⏱️ Extracted {len(pending)} words in {elapsed:.1f}s "
+        f"({len(pending) / elapsed if elapsed else 0:.1f} words/s, {workers} worker(s))"
+    )
 
     # Print difficulty distribution
-    difficulty_counts = defaultdict(int)
-    for w in enhanced_words:
-        difficulty_counts[w["difficulty"]] += 1
-
     print(f"\n📊 Difficulty distribution:")
     for diff, count in sorted(difficulty_counts.items()):
         print(f"   {diff}: {count}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--workers", type=int, help="worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--output",
+        default="functions/enhanced_words.json",
+        help="output file, .jsonl for the JSON Lines format",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="re-extract every word from scratch"
+    )
+    args = parser.parse_args()
+
     # Load existing word list
     print("Loading existing word list...")
     with open("functions/words.txt", "r", encoding="utf-8") as f:
@@ -245,4 +669,9 @@ if __name__ == "__main__":
     # Process all words
     print(f"Processing all {len(all_words)} words\n")
 
-    process_word_list(all_words, "functions/enhanced_words.json")
+    process_word_list(
+        all_words,
+        args.output,
+        workers=args.workers,
+        incremental=not args.full,
+    )
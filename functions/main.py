@@ -11,30 +11,44 @@ Functions:
 """
 
 import json
+import queue
 import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from firebase_admin import auth, firestore, initialize_app
 from firebase_functions import firestore_fn, https_fn, options, scheduler_fn
 from google.cloud.firestore_v1 import FieldFilter
+from word_corpus import WordCorpus, WordRecord
+from word_sampler import WordSampler
 
 initialize_app()
 
-# Load enhanced word list (fail loud if not available)
-with open("enhanced_words.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-    ENHANCED_WORDS = data.get("words", [])
-    if not ENHANCED_WORDS:
-        raise ValueError("enhanced_words.json contains no words")
-    print(f"✅ Loaded {len(ENHANCED_WORDS)} enhanced words")
+# Memory-map the compiled word corpus (fail loud if not available)
+# Build it with: python word_corpus.py enhanced_words.json enhanced_words.bin
+WORD_CORPUS = WordCorpus("enhanced_words.bin")
+if not len(WORD_CORPUS):
+    raise ValueError("enhanced_words.bin contains no words")
+print(f"✅ Loaded {len(WORD_CORPUS)} enhanced words")
 
+WORD_SAMPLER = WordSampler(WORD_CORPUS)
 
-def get_random_word() -> dict:
+
+def draw_room_word(room_data: dict) -> tuple[WordRecord, dict]:
     """
-    Select a random word from the enhanced word list.
-    Returns enhanced word data dict with word, hints, and category.
+    Draw the next word for a room without repeating earlier rounds
+
+    The room may narrow the pool with ``wordDifficulty`` (a level or a
+    list of levels) and ``wordCategory``. Returns the word data and the
+    updated ``wordBag`` to store on the room.
     """
-    return random.choice(ENHANCED_WORDS)
+    return WORD_SAMPLER.draw(
+        room_data.get("wordBag"),
+        difficulty=room_data.get("wordDifficulty"),
+        category=room_data.get("wordCategory"),
+    )
 
 
 def select_impostor(player_ids: list[str]) -> str:
@@ -42,16 +56,58 @@ def select_impostor(player_ids: list[str]) -> str:
     return random.choice(player_ids)
 
 
-def delete_discord_sessions_for_room(db, room_code: str) -> int:
+# Firestore caps `in` filters at 30 values
+SESSION_QUERY_BATCH_SIZE = 30
+
+
+def find_discord_sessions_for_rooms(db, room_codes) -> dict[str, list]:
+    """
+    Map room codes to the discord user sessions pointing at them
+
+    Sessions store the room code upper-cased in ``current_room``, so they
+    are looked up with indexed ``in`` queries of up to 30 codes instead of
+    scanning the whole collection.
+
+    Parameters
+    ----------
+    db : firestore.Client
+        Firestore database client
+    room_codes : Iterable[str]
+        Room codes to look up
+
+    Returns
+    -------
+    dict[str, list]
+        Upper-cased room code -> session snapshots
+    """
+    codes = sorted({code.upper() for code in room_codes if code})
+    sessions_ref = db.collection("discord_user_sessions")
+
+    sessions_by_room = {}
+    for i in range(0, len(codes), SESSION_QUERY_BATCH_SIZE):
+        query = sessions_ref.where(
+            filter=FieldFilter(
+                "current_room", "in", codes[i : i + SESSION_QUERY_BATCH_SIZE]
+            )
+        )
+        for session in query.stream():
+            sessions_by_room.setdefault(session.get("current_room"), []).append(session)
+
+    return sessions_by_room
+
+
+def delete_discord_sessions_for_rooms(db, room_codes, bulk_writer=None) -> int:
     """
-    Delete all discord user sessions associated with a specific room
+    Delete all discord user sessions associated with the given rooms
 
     Parameters
     ----------
     db : firestore.Client
         Firestore database client
-    room_code : str
-        Room code to delete sessions for
+    room_codes : Iterable[str]
+        Room codes to delete sessions for
+    bulk_writer : BulkWriter | None
+        Writer to queue the deletes on; sessions are deleted directly if None
 
     Returns
     -------
@@ -59,26 +115,418 @@ def delete_discord_sessions_for_room(db, room_code: str) -> int:
         Number of sessions deleted
     """
     deleted_count = 0
-    sessions_ref = db.collection("discord_user_sessions")
 
     try:
-        sessions = sessions_ref.stream()
-        for session in sessions:
-            session_data = session.to_dict()
-            current_room = session_data.get("current_room", "")
-
-            if current_room.upper() == room_code.upper():
-                session.reference.delete()
+        sessions_by_room = find_discord_sessions_for_rooms(db, room_codes)
+        for room_code, sessions in sessions_by_room.items():
+            for session in sessions:
+                if bulk_writer:
+                    bulk_writer.delete(session.reference)
+                else:
+                    session.reference.delete()
                 deleted_count += 1
                 print(
                     f"🗑️  Deleted discord session for user {session.id} (room {room_code})"
                 )
     except Exception as e:
-        print(f"⚠️  Error deleting discord sessions for room {room_code}: {e}")
+        print(f"⚠️  Error deleting discord sessions: {e}")
 
     return deleted_count
 
 
+ROOM_SUBCOLLECTIONS = ("players", "secrets")
+ROOM_CLEANUP_PAGE_SIZE = 200
+ROOM_CLEANUP_WORKERS = 8
+ROOM_CLEANUP_TIME_BUDGET_SECONDS = 45
+# Same as BulkWriter's default retry policy
+BULK_WRITE_MAX_ATTEMPTS = 15
+
+
+def collect_room_tree(room_doc) -> list:
+    """
+    List every document reference belonging to a room
+
+    Parameters
+    ----------
+    room_doc : DocumentSnapshot
+        Room to collect
+
+    Returns
+    -------
+    list
+        Document references to delete, subcollections first and the room last
+    """
+    refs = []
+    for name in ROOM_SUBCOLLECTIONS:
+        refs.extend(room_doc.reference.collection(name).list_documents(page_size=500))
+    refs.append(room_doc.reference)
+    return refs
+
+
+def format_room_cursor(created_at: datetime, room_id: str) -> str:
+    """Encode a room cleanup cursor as ``<createdAt ISO>|<room ID>``"""
+    return f"{created_at.isoformat()}|{room_id}"
+
+
+def parse_room_cursor(cursor: str) -> tuple[datetime, str | None]:
+    """
+    Decode a room cleanup cursor
+
+    Parameters
+    ----------
+    cursor : str
+        ``<createdAt ISO>|<room ID>``; a bare timestamp resumes after every
+        room created at or before it
+
+    Returns
+    -------
+    tuple[datetime, str | None]
+        (createdAt, room ID or None)
+
+    Raises
+    ------
+    ValueError
+        If the timestamp is not ISO 8601
+    """
+    created_at, _, room_id = cursor.partition("|")
+    return datetime.fromisoformat(created_at), room_id or None
+
+
+def delete_old_rooms(
+    db,
+    cutoff_time: datetime,
+    cursor: tuple[datetime, str | None] | None = None,
+    page_size: int = ROOM_CLEANUP_PAGE_SIZE,
+    max_workers: int = ROOM_CLEANUP_WORKERS,
+    time_budget_seconds: float = ROOM_CLEANUP_TIME_BUDGET_SECONDS,
+) -> dict:
+    """
+    Delete rooms created before cutoff_time, with their subcollections
+
+    Rooms are read a page at a time in (createdAt, room ID) order. Their
+    subcollections are listed concurrently by a bounded worker pool and all
+    deletes go through one BulkWriter. Deletes are counted from the writer's
+    results, so writes dropped after their retries are reported as
+    writesFailed instead of deleted. When the time budget runs out, the
+    position of the last room is returned as nextCursor so the next run can
+    resume.
+
+    Parameters
+    ----------
+    db : firestore.Client
+        Firestore database client
+    cutoff_time : datetime
+        Rooms created before this time are deleted
+    cursor : tuple[datetime, str | None] | None
+        (createdAt, room ID) to resume after, see ``parse_room_cursor``
+    page_size : int
+        Rooms read per page
+    max_workers : int
+        Rooms collected concurrently
+    time_budget_seconds : float
+        Stop after the page that exceeds this budget
+
+    Returns
+    -------
+    dict
+        Deletion stats: rooms, docs and sessions deleted, writes failed,
+        elapsed seconds, docs per second and nextCursor (None when done)
+    """
+    started = time.monotonic()
+    rooms_query = (
+        db.collection("rooms")
+        .where(filter=FieldFilter("createdAt", "<", cutoff_time))
+        .order_by("createdAt")
+        .order_by("__name__")
+    )
+
+    # Updated from the BulkWriter's worker threads
+    counts = {"rooms": 0, "docs": 0, "sessions": 0, "failed": 0}
+    counts_lock = threading.Lock()
+
+    def on_write_result(reference, result, bulk_writer):
+        path = reference.path.split("/")
+        with counts_lock:
+            if path[0] == "discord_user_sessions":
+                counts["sessions"] += 1
+                return
+            counts["docs"] += 1
+            if len(path) == 2:
+                counts["rooms"] += 1
+
+    def on_write_error(error, bulk_writer) -> bool:
+        if error.attempts < BULK_WRITE_MAX_ATTEMPTS:
+            return True
+        with counts_lock:
+            counts["failed"] += 1
+        print(
+            f"⚠️  Giving up deleting {error.operation.reference.path}: {error.message}"
+        )
+        return False
+
+    next_cursor = None
+
+    bulk_writer = db.bulk_writer()
+    bulk_writer.on_write_result(on_write_result)
+    bulk_writer.on_write_error(on_write_error)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while True:
+                page_query = rooms_query.limit(page_size)
+                if cursor:
+                    created_at, room_id = cursor
+                    position = {"createdAt": created_at}
+                    if room_id:
+                        position["__name__"] = room_id
+                    page_query = page_query.start_after(position)
+                rooms_docs = list(page_query.stream())
+                if not rooms_docs:
+                    break
+
+                # The room ID is the code discord sessions point at
+                delete_discord_sessions_for_rooms(
+                    db, [room_doc.id for room_doc in rooms_docs], bulk_writer
+                )
+
+                for refs in pool.map(collect_room_tree, rooms_docs):
+                    for ref in refs:
+                        bulk_writer.delete(ref)
+                bulk_writer.flush()
+
+                cursor = (rooms_docs[-1].get("createdAt"), rooms_docs[-1].id)
+                print(f"🗑️  Deleted {counts['rooms']} room(s) so far")
+
+                if len(rooms_docs) < page_size:
+                    break
+                if time.monotonic() - started > time_budget_seconds:
+                    next_cursor = cursor
+                    break
+    finally:
+        # Flushes writes still queued if a page failed midway
+        bulk_writer.close()
+
+    elapsed = time.monotonic() - started
+    return {
+        "roomsDeleted": counts["rooms"],
+        "docsDeleted": counts["docs"],
+        "sessionsDeleted": counts["sessions"],
+        "writesFailed": counts["failed"],
+        "seconds": round(elapsed, 3),
+        "docsPerSecond": round(counts["docs"] / elapsed, 1) if elapsed else 0.0,
+        "nextCursor": format_room_cursor(*next_cursor) if next_cursor else None,
+    }
+
+
+SESSION_SWEEP_PAGE_SIZE = 300
+SESSION_SWEEP_MAX_PAGES = 20
+
+
+def sweep_orphaned_discord_sessions(
+    db,
+    page_size: int = SESSION_SWEEP_PAGE_SIZE,
+    max_pages: int = SESSION_SWEEP_MAX_PAGES,
+) -> dict:
+    """
+    Delete discord sessions whose room no longer exists, a bounded slice per run
+
+    Sessions are paged in document ID order starting from the checkpoint
+    stored in ``maintenance/discord_session_sweep``. For every page the
+    referenced rooms are checked with one batched ``get_all``. The cursor
+    is persisted after each page and wraps around once the end is reached.
+
+    Parameters
+    ----------
+    db : firestore.Client
+        Firestore database client
+    page_size : int
+        Sessions read per page
+    max_pages : int
+        Pages processed per run
+
+    Returns
+    -------
+    dict
+        Sessions scanned and deleted, document reads used and the cursor
+        the next run starts from
+    """
+    checkpoint_ref = db.collection("maintenance").document("discord_session_sweep")
+    checkpoint = checkpoint_ref.get()
+    cursor = checkpoint.get("cursor") if checkpoint.exists else None
+    reads = 1
+
+    sessions_query = (
+        db.collection("discord_user_sessions").order_by("__name__").limit(page_size)
+    )
+    rooms_ref = db.collection("rooms")
+
+    scanned = 0
+    deleted = 0
+
+    for _ in range(max_pages):
+        page_query = (
+            sessions_query.start_after({"__name__": cursor})
+            if cursor
+            else sessions_query
+        )
+        sessions = list(page_query.stream())
+        reads += max(len(sessions), 1)
+        scanned += len(sessions)
+
+        session_rooms = {
+            session.id: (session.to_dict().get("current_room") or "").upper()
+            for session in sessions
+        }
+        room_codes = {code for code in session_rooms.values() if code}
+        existing_rooms = set()
+        if room_codes:
+            room_refs = [rooms_ref.document(code) for code in room_codes]
+            existing_rooms = {doc.id for doc in db.get_all(room_refs) if doc.exists}
+            reads += len(room_refs)
+
+        batch = db.batch()
+        orphaned = 0
+        for session in sessions:
+            current_room = session_rooms[session.id]
+            if current_room and current_room not in existing_rooms:
+                batch.delete(session.reference)
+                orphaned += 1
+                print(
+                    f"🗑️  Deleted session for user {session.id} (room {current_room} no longer exists)"
+                )
+        if orphaned:
+            batch.commit()
+            deleted += orphaned
+
+        # Wrap around to the beginning once the collection is exhausted
+        cursor = sessions[-1].id if len(sessions) == page_size else None
+        checkpoint_ref.set({"cursor": cursor, "updatedAt": firestore.SERVER_TIMESTAMP})
+
+        if cursor is None:
+            break
+
+    return {
+        "sessionsScanned": scanned,
+        "sessionsDeleted": deleted,
+        "reads": reads,
+        "nextCursor": cursor,
+    }
+
+
+# auth.delete_users accepts at most 1000 UIDs and is limited to about 1 QPS
+AUTH_DELETE_BATCH_SIZE = 1000
+AUTH_DELETE_MIN_INTERVAL_SECONDS = 1.0
+
+
+def is_stale_anonymous_user(user, cutoff_timestamp: int) -> bool:
+    """Check if a user is anonymous and last signed in before cutoff_timestamp (ms)"""
+    # Check if user is anonymous
+    is_anonymous = any(
+        provider.provider_id == "anonymous" for provider in user.provider_data
+    )
+
+    # For anonymous users, provider_data is empty
+    if user.provider_data and not is_anonymous:
+        return False
+
+    # Check last sign-in time
+    last_signin_timestamp = user.user_metadata.last_sign_in_timestamp
+    return bool(last_signin_timestamp and last_signin_timestamp < cutoff_timestamp)
+
+
+def purge_anonymous_users(cutoff_timestamp: int) -> dict:
+    """
+    Delete anonymous users who have not signed in since cutoff_timestamp
+
+    A producer thread pages through ``auth.list_users`` and hands stale
+    UIDs over in chunks of up to 1000, while the caller's thread deletes
+    each chunk with one ``auth.delete_users`` call, so listing and
+    deleting overlap.
+
+    Parameters
+    ----------
+    cutoff_timestamp : int
+        Last sign-in cutoff in milliseconds since the epoch
+
+    Returns
+    -------
+    dict
+        Users scanned, deleted and failed, elapsed seconds and per-second rates
+    """
+    started = time.monotonic()
+    uid_chunks = queue.Queue(maxsize=4)
+    stats = {"usersScanned": 0, "usersDeleted": 0, "deleteFailures": 0}
+    producer_errors = []
+    # Set when the deleting side stops early, so the producer never blocks on
+    # a full queue nobody drains and does not outlive the invocation
+    stop = threading.Event()
+
+    def hand_over(item) -> bool:
+        while not stop.is_set():
+            try:
+                uid_chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            stale_uids = []
+            page = auth.list_users()
+            while page and not stop.is_set():
+                for user in page.users:
+                    stats["usersScanned"] += 1
+                    if is_stale_anonymous_user(user, cutoff_timestamp):
+                        stale_uids.append(user.uid)
+                    if len(stale_uids) == AUTH_DELETE_BATCH_SIZE:
+                        if not hand_over(stale_uids):
+                            return
+                        stale_uids = []
+
+                # Get next page
+                page = page.get_next_page()
+
+            if stale_uids:
+                hand_over(stale_uids)
+        except Exception as e:
+            producer_errors.append(e)
+        finally:
+            hand_over(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    last_delete = 0.0
+    try:
+        while (uids := uid_chunks.get()) is not None:
+            wait = AUTH_DELETE_MIN_INTERVAL_SECONDS - (time.monotonic() - last_delete)
+            if wait > 0:
+                time.sleep(wait)
+            last_delete = time.monotonic()
+
+            result = auth.delete_users(uids)
+            stats["usersDeleted"] += result.success_count
+            stats["deleteFailures"] += result.failure_count
+            for error in result.errors:
+                print(f"⚠️  Failed to delete user {uids[error.index]}: {error.reason}")
+            print(f"🗑️  Deleted {result.success_count} anonymous user(s)")
+    finally:
+        stop.set()
+        producer.join()
+    if producer_errors:
+        raise producer_errors[0]
+
+    elapsed = time.monotonic() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["scannedPerSecond"] = (
+        round(stats["usersScanned"] / elapsed, 1) if elapsed else 0.0
+    )
+    stats["deletedPerSecond"] = (
+        round(stats["usersDeleted"] / elapsed, 1) if elapsed else 0.0
+    )
+    return stats
+
+
 @firestore_fn.on_document_updated(
     document="rooms/{room_id}", region=options.SupportedRegion.US_CENTRAL1
 )
@@ -103,82 +551,112 @@ def on_game_start(event: firestore_fn.Event[firestore_fn.Change]) -> None:
         )
 
         try:
+            started = time.monotonic()
             db = firestore.client()
             room_ref = db.collection("rooms").document(room_id)
-
-            # Get all players
             players_ref = room_ref.collection("players")
-            players_docs = list(players_ref.stream())
-            player_ids = [doc.id for doc in players_docs]
-            players = {doc.id: doc.to_dict() for doc in players_docs}
-
-            if len(player_ids) < 2:
-                print("❌ Not enough players to start game")
-                return
+            secrets_ref = room_ref.collection("secrets")
 
-            # Select random word and impostor
-            word_data = get_random_word()
-            word = word_data["word"]
-            hints = word_data.get("hints", [])
-            category = word_data.get("category", "other")
+            # Old secret references need no transactional read: stale ones
+            # are only deleted, current players' secrets are overwritten
+            old_secret_refs = list(secrets_ref.list_documents())
+
+            @firestore.transactional
+            def deal(transaction) -> dict:
+                # Reads and writes commit together; if the room changes
+                # meanwhile (another restart, a settings toggle) the
+                # transaction is retried against the new room state
+                room_doc = room_ref.get(transaction=transaction)
+                room_data = room_doc.to_dict() if room_doc.exists else {}
+
+                # Redelivered events must not deal twice
+                if room_data.get("dealEventId") == event.id:
+                    return {"skipped": f"Event {event.id} already dealt"}
+                if room_data.get("status") != "started":
+                    return {"skipped": "Room is no longer waiting for a deal"}
+
+                players_docs = list(players_ref.stream(transaction=transaction))
+                player_ids = [doc.id for doc in players_docs]
+                players = {doc.id: doc.to_dict() for doc in players_docs}
+
+                if len(player_ids) < 2:
+                    return {"skipped": "Not enough players to start game"}
+
+                # Select random word and impostor
+                word_data, word_bag = draw_room_word(room_data)
+                impostor_id = select_impostor(player_ids)
+
+                # Generate random speaking order
+                speaking_order = player_ids.copy()
+                random.shuffle(speaking_order)
+
+                # Remove stale secrets; current players' secrets are overwritten
+                stale_secret_refs = [
+                    ref for ref in old_secret_refs if ref.id not in players
+                ]
+                for secret_ref in stale_secret_refs:
+                    transaction.delete(secret_ref)
+
+                for player_id in player_ids:
+                    player = players[player_id]
+                    is_impostor = player_id == impostor_id
+
+                    secret_data = {
+                        "name": player.get("name"),
+                        "role": "impostor" if is_impostor else "player",
+                        "word": None if is_impostor else word_data.word,
+                        "discordId": player.get("discordId"),
+                        "createdAt": firestore.SERVER_TIMESTAMP,
+                    }
 
-            impostor_id = select_impostor(player_ids)
+                    # Add hints for impostor
+                    if is_impostor and word_data.hints:
+                        secret_data["hints"] = word_data.hints
+                        secret_data["category"] = word_data.category
 
-            # Generate random speaking order
-            speaking_order = player_ids.copy()
-            random.shuffle(speaking_order)
+                    transaction.set(secrets_ref.document(player_id), secret_data)
 
-            print(f"📝 Selected word: {word} (category: {category})")
-            print(f"🎭 Selected impostor: {impostor_id}")
-            print(f"🎤 Speaking order: {speaking_order}")
-            if hints:
-                print(f"💡 Impostor hints: {hints}")
+                # Update room with game info
+                transaction.update(
+                    room_ref,
+                    {
+                        "word": word_data.word,
+                        "impostorId": impostor_id,
+                        "speakingOrder": speaking_order,
+                        "status": "dealt",
+                        "startedAt": firestore.SERVER_TIMESTAMP,
+                        "dealEventId": event.id,
+                        "wordBag": word_bag,
+                    },
+                )
 
-            # Delete old secrets if this is a restart
-            secrets_ref = room_ref.collection("secrets")
-            old_secrets = list(secrets_ref.stream())
-            if old_secrets:
-                print(f"🗑️  Deleting {len(old_secrets)} old secrets")
-                for secret_doc in old_secrets:
-                    secret_doc.reference.delete()
-
-            # Create secrets for each player
-            batch = db.batch()
-
-            for player_id in player_ids:
-                player = players[player_id]
-                is_impostor = player_id == impostor_id
-
-                secret_data = {
-                    "name": player.get("name"),
-                    "role": "impostor" if is_impostor else "player",
-                    "word": None if is_impostor else word,
-                    "discordId": player.get("discordId"),
-                    "createdAt": firestore.SERVER_TIMESTAMP,
+                return {
+                    "word_data": word_data,
+                    "impostor_id": impostor_id,
+                    "speaking_order": speaking_order,
+                    "stale_secrets": len(stale_secret_refs),
                 }
 
-                # Add hints for impostor
-                if is_impostor and hints:
-                    secret_data["hints"] = hints
-                    secret_data["category"] = category
-
-                batch.set(secrets_ref.document(player_id), secret_data)
+            result = deal(db.transaction())
+            if "skipped" in result:
+                print(f"↩️  Room {room_id}: {result['skipped']}")
+                return
 
-            # Update room with game info
-            batch.update(
-                room_ref,
-                {
-                    "word": word,
-                    "impostorId": impostor_id,
-                    "speakingOrder": speaking_order,
-                    "status": "dealt",
-                    "startedAt": firestore.SERVER_TIMESTAMP,
-                },
+            word_data = result["word_data"]
+            print(
+                f"📝 Selected word: {word_data.word} (category: {word_data.category})"
+            )
+            print(f"🎭 Selected impostor: {result['impostor_id']}")
+            print(f"🎤 Speaking order: {result['speaking_order']}")
+            if word_data.hints:
+                print(f"💡 Impostor hints: {word_data.hints}")
+            if result["stale_secrets"]:
+                print(f"🗑️  Deleted {result['stale_secrets']} old secrets")
+
+            deal_ms = (time.monotonic() - started) * 1000
+            print(
+                f"✅ Game started successfully for room {room_id} in {deal_ms:.0f} ms"
             )
-
-            batch.commit()
-
-            print(f"✅ Game started successfully for room {room_id}")
 
         except Exception as e:
             print(f"❌ Error starting game for room {room_id}: {e}")
@@ -199,49 +677,17 @@ def cleanup_old_rooms(event: scheduler_fn.ScheduledEvent) -> dict:
     print(f"🧹 Starting cleanup of rooms older than {cutoff_time.isoformat()}")
 
     try:
-        rooms_query = db.collection("rooms").where(
-            filter=FieldFilter("createdAt", "<", cutoff_time)
-        )
-        rooms_docs = list(rooms_query.stream())
-
-        if not rooms_docs:
-            print("✅ No old rooms to clean up")
-            return {"success": True, "roomsDeleted": 0}
-
-        deleted_count = 0
-        sessions_deleted = 0
-
-        for room_doc in rooms_docs:
-            room_id = room_doc.id
-            room_data = room_doc.to_dict()
-            room_code = room_data.get("code", "")
-            print(f"🗑️  Deleting room: {room_id} (code: {room_code})")
-
-            # Delete discord sessions for this room
-            if room_code:
-                sessions_deleted += delete_discord_sessions_for_room(db, room_code)
-
-            # Delete subcollections
-            players_ref = room_doc.reference.collection("players")
-            for player_doc in players_ref.stream():
-                player_doc.reference.delete()
-
-            secrets_ref = room_doc.reference.collection("secrets")
-            for secret_doc in secrets_ref.stream():
-                secret_doc.reference.delete()
-
-            # Delete room document
-            room_doc.reference.delete()
-            deleted_count += 1
+        stats = delete_old_rooms(db, cutoff_time)
 
         print(
-            f"✅ Cleanup complete: {deleted_count} room(s) deleted, {sessions_deleted} discord session(s) deleted"
+            f"✅ Cleanup complete: {stats['roomsDeleted']} room(s) deleted, "
+            f"{stats['sessionsDeleted']} discord session(s) deleted, "
+            f"{stats['writesFailed']} write(s) failed, "
+            f"{stats['docsPerSecond']} docs/sec"
         )
-        return {
-            "success": True,
-            "roomsDeleted": deleted_count,
-            "sessionsDeleted": sessions_deleted,
-        }
+        if stats["nextCursor"]:
+            print("⏳ Time budget reached, remaining rooms are picked up next run")
+        return {"success": True, **stats}
 
     except Exception as e:
         print(f"❌ Cleanup error: {e}")
@@ -278,59 +724,32 @@ def manual_cleanup(req: https_fn.Request) -> https_fn.Response:
             headers={"Content-Type": "application/json"},
         )
 
-    cutoff_time = datetime.now() - timedelta(hours=hours)
-
-    print(f"🧹 Manual cleanup: rooms older than {cutoff_time.isoformat()}")
-
+    cursor_param = req.args.get("cursor")
     try:
-        rooms_query = db.collection("rooms").where(
-            filter=FieldFilter("createdAt", "<", cutoff_time)
+        cursor = parse_room_cursor(cursor_param) if cursor_param else None
+    except ValueError:
+        return https_fn.Response(
+            json.dumps({"error": "Invalid cursor parameter"}),
+            status=400,
+            headers={"Content-Type": "application/json"},
         )
-        rooms_docs = list(rooms_query.stream())
 
-        if not rooms_docs:
-            return https_fn.Response(
-                json.dumps(
-                    {
-                        "message": "No old rooms to clean up",
-                        "roomsDeleted": 0,
-                        "sessionsDeleted": 0,
-                        "hoursThreshold": hours,
-                    }
-                ),
-                headers={"Content-Type": "application/json"},
-            )
-
-        deleted_count = 0
-        sessions_deleted = 0
-
-        for room_doc in rooms_docs:
-            room_data = room_doc.to_dict()
-            room_code = room_data.get("code", "")
-
-            # Delete discord sessions for this room
-            if room_code:
-                sessions_deleted += delete_discord_sessions_for_room(db, room_code)
-
-            # Delete subcollections
-            players_ref = room_doc.reference.collection("players")
-            for player_doc in players_ref.stream():
-                player_doc.reference.delete()
+    cutoff_time = datetime.now() - timedelta(hours=hours)
 
-            secrets_ref = room_doc.reference.collection("secrets")
-            for secret_doc in secrets_ref.stream():
-                secret_doc.reference.delete()
+    print(f"🧹 Manual cleanup: rooms older than {cutoff_time.isoformat()}")
 
-            # Delete room document
-            room_doc.reference.delete()
-            deleted_count += 1
+    try:
+        stats = delete_old_rooms(db, cutoff_time, cursor=cursor)
 
         return https_fn.Response(
             json.dumps(
                 {
-                    "message": "Cleanup completed successfully",
-                    "roomsDeleted": deleted_count,
-                    "sessionsDeleted": sessions_deleted,
+                    "message": (
+                        "Cleanup completed successfully"
+                        if stats["roomsDeleted"]
+                        else "No old rooms to clean up"
+                    ),
+                    **stats,
                     "hoursThreshold": hours,
                 }
             ),
@@ -362,40 +781,14 @@ def cleanup_anonymous_users(event: scheduler_fn.ScheduledEvent) -> dict:
     )
 
     try:
-        deleted_count = 0
-        page = auth.list_users()
-
-        while page:
-            for user in page.users:
-                # Check if user is anonymous
-                is_anonymous = any(
-                    provider.provider_id == "anonymous"
-                    for provider in user.provider_data
-                )
+        stats = purge_anonymous_users(cutoff_timestamp)
 
-                # For anonymous users, provider_data is empty
-                if not user.provider_data or is_anonymous:
-                    # Check last sign-in time
-                    last_signin_timestamp = user.user_metadata.last_sign_in_timestamp
-
-                    if (
-                        last_signin_timestamp
-                        and last_signin_timestamp < cutoff_timestamp
-                    ):
-                        try:
-                            auth.delete_user(user.uid)
-                            deleted_count += 1
-                            print(f"🗑️  Deleted anonymous user: {user.uid}")
-                        except Exception as delete_error:
-                            print(
-                                f"⚠️  Failed to delete user {user.uid}: {delete_error}"
-                            )
-
-            # Get next page
-            page = page.get_next_page()
-
-        print(f"✅ User cleanup complete: {deleted_count} anonymous user(s) deleted")
-        return {"success": True, "usersDeleted": deleted_count}
+        print(
+            f"✅ User cleanup complete: {stats['usersDeleted']} anonymous user(s) "
+            f"deleted, {stats['usersScanned']} scanned, "
+            f"{stats['deletedPerSecond']} deleted/sec"
+        )
+        return {"success": True, **stats}
 
     except Exception as e:
         print(f"❌ User cleanup error: {e}")
@@ -441,42 +834,13 @@ def manual_user_cleanup(req: https_fn.Request) -> https_fn.Response:
     )
 
     try:
-        deleted_count = 0
-        page = auth.list_users()
-
-        while page:
-            for user in page.users:
-                # Check if user is anonymous
-                is_anonymous = any(
-                    provider.provider_id == "anonymous"
-                    for provider in user.provider_data
-                )
-
-                # For anonymous users, provider_data is empty
-                if not user.provider_data or is_anonymous:
-                    # Check last sign-in time
-                    last_signin_timestamp = user.user_metadata.last_sign_in_timestamp
-
-                    if (
-                        last_signin_timestamp
-                        and last_signin_timestamp < cutoff_timestamp
-                    ):
-                        try:
-                            auth.delete_user(user.uid)
-                            deleted_count += 1
-                        except Exception as delete_error:
-                            print(
-                                f"⚠️  Failed to delete user {user.uid}: {delete_error}"
-                            )
-
-            # Get next page
-            page = page.get_next_page()
+        stats = purge_anonymous_users(cutoff_timestamp)
 
         return https_fn.Response(
             json.dumps(
                 {
                     "message": "User cleanup completed successfully",
-                    "usersDeleted": deleted_count,
+                    **stats,
                     "daysThreshold": days,
                 }
             ),
@@ -498,43 +862,22 @@ def manual_user_cleanup(req: https_fn.Request) -> https_fn.Response:
 def cleanup_discord_sessions(event: scheduler_fn.ScheduledEvent) -> dict:
     """
     Scheduled function to clean up orphaned discord user sessions
-    Runs every 24 hours and removes sessions for rooms that no longer exist
+    Runs every 24 hours and removes sessions for rooms that no longer exist,
+    resuming from the previous run's checkpoint
     """
     db = firestore.client()
 
     print("🧹 Starting cleanup of orphaned discord user sessions")
 
     try:
-        # Get all active room codes
-        rooms = db.collection("rooms").stream()
-        active_room_codes = set()
-        for room in rooms:
-            room_data = room.to_dict()
-            if "code" in room_data:
-                active_room_codes.add(room_data["code"].upper())
-
-        print(f"📋 Found {len(active_room_codes)} active rooms")
-
-        # Get all discord sessions
-        sessions = db.collection("discord_user_sessions").stream()
-        deleted_count = 0
-
-        for session in sessions:
-            session_data = session.to_dict()
-            current_room = session_data.get("current_room", "").upper()
-
-            # Delete if room doesn't exist
-            if current_room and current_room not in active_room_codes:
-                session.reference.delete()
-                deleted_count += 1
-                print(
-                    f"🗑️  Deleted session for user {session.id} (room {current_room} no longer exists)"
-                )
+        stats = sweep_orphaned_discord_sessions(db)
 
         print(
-            f"✅ Discord session cleanup complete: {deleted_count} orphaned session(s) deleted"
+            f"✅ Discord session cleanup complete: {stats['sessionsDeleted']} orphaned "
+            f"session(s) deleted, {stats['sessionsScanned']} scanned, "
+            f"{stats['reads']} read(s)"
         )
-        return {"success": True, "sessionsDeleted": deleted_count}
+        return {"success": True, **stats}
 
     except Exception as e:
         print(f"❌ Discord session cleanup error: {e}")
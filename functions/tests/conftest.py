@@ -0,0 +1,51 @@
+"""
+Shared fixtures for the Cloud Functions tests
+
+The word corpus and sampler are plain Python; the Firebase entry points in
+``main.py`` are not imported here.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+FUNCTIONS_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(FUNCTIONS_DIR))
+
+from word_corpus import WordCorpus, compile_corpus
+
+
+@pytest.fixture
+def word():
+    """Build a source word dict"""
+
+    def make(text: str, difficulty: str, category: str, **extra) -> dict:
+        return {
+            "word": text,
+            "hints": [f"{text}-hint"],
+            "difficulty": difficulty,
+            "category": category,
+            **extra,
+        }
+
+    return make
+
+
+@pytest.fixture
+def build_corpus(tmp_path):
+    """Compile a list of word dicts into a corpus file and open it"""
+    corpora = []
+
+    def build(words: list[dict]) -> WordCorpus:
+        source = tmp_path / f"words{len(corpora)}.json"
+        source.write_text(json.dumps({"words": words}), encoding="utf-8")
+        output = tmp_path / f"words{len(corpora)}.bin"
+        compile_corpus(str(source), str(output))
+        corpora.append(WordCorpus(str(output)))
+        return corpora[-1]
+
+    yield build
+    for corpus in corpora:
+        corpus.close()
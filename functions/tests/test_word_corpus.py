@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+
+import pytest
+from word_corpus import WordCorpus, compile_corpus
+
+FUNCTIONS_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_records_round_trip(build_corpus, word):
+    words = [
+        word("kot", "easy", "animals", hypernyms=["zwierzę"]),
+        word("pies", "easy", "animals"),
+        word("demokracja", "hard", "society"),
+    ]
+    corpus = build_corpus(words)
+
+    assert len(corpus) == 3
+    for i, source in enumerate(words):
+        record = corpus[i]
+        assert record.word == source["word"]
+        assert record.hints == source["hints"]
+        assert record.difficulty == source["difficulty"]
+        assert record.category == source["category"]
+    assert corpus[0].metadata == {"hypernyms": ["zwierzę"]}
+    assert corpus[1].metadata == {}
+    assert list(corpus.iter_labels())[2] == (2, "hard", "society")
+
+
+def test_index_out_of_range(build_corpus, word):
+    corpus = build_corpus([word("kot", "easy", "animals")])
+
+    with pytest.raises(IndexError):
+        corpus[1]
+
+
+def test_jsonl_source_is_streamed(tmp_path, word):
+    source = tmp_path / "words.jsonl"
+    lines = [{"version": 1}, word("kot", "easy", "animals"), {"total": 1}]
+    source.write_text("\n".join(json.dumps(line) for line in lines), encoding="utf-8")
+
+    assert compile_corpus(str(source), str(tmp_path / "words.bin")) == 1
+    corpus = WordCorpus(str(tmp_path / "words.bin"))
+    assert corpus[0].word == "kot"
+    corpus.close()
+
+
+def test_separator_in_word_is_rejected(tmp_path, word):
+    source = tmp_path / "words.json"
+    source.write_text(json.dumps({"words": [word("k\x1fot", "easy", "animals")]}))
+
+    with pytest.raises(ValueError):
+        compile_corpus(str(source), str(tmp_path / "words.bin"))
+
+
+def test_shipped_word_list_round_trips(tmp_path):
+    source = FUNCTIONS_DIR / "enhanced_words.json"
+    words = json.loads(source.read_text(encoding="utf-8"))["words"]
+
+    compile_corpus(str(source), str(tmp_path / "words.bin"))
+    corpus = WordCorpus(str(tmp_path / "words.bin"))
+
+    assert len(corpus) == len(words)
+    for i, source_word in enumerate(words):
+        record = corpus[i]
+        assert record.word == source_word["word"]
+        assert record.hints == source_word.get("hints", [])
+        assert record.difficulty == source_word.get("difficulty", "medium")
+        assert record.category == source_word.get("category", "other")
+    corpus.close()
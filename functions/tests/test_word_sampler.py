@@ -0,0 +1,95 @@
+import random
+
+import pytest
+from word_sampler import WordSampler, _clean_filters, _permute
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 5, 7, 8, 31, 64, 100, 1000, 4785])
+def test_permute_is_a_bijection(size):
+    rng = random.Random(size)
+    for _ in range(5):
+        key = rng.getrandbits(63)
+        assert sorted(_permute(i, size, key) for i in range(size)) == list(range(size))
+
+
+def test_permute_orders_depend_on_the_key():
+    rng = random.Random(0)
+    keys = [rng.getrandbits(63) for _ in range(2000)]
+    orders = {tuple(_permute(i, 5, key) for i in range(5)) for key in keys}
+    # All 120 orders of a small pool are reachable, not a handful of strides
+    assert len(orders) == 120
+
+
+@pytest.fixture
+def sampler(build_corpus, word):
+    words = [word(f"easy{i}", "easy", "animals") for i in range(5)]
+    words += [word(f"hard{i}", "hard", "society") for i in range(3)]
+    return WordSampler(build_corpus(words))
+
+
+def test_bag_draws_every_word_once_per_pass(sampler):
+    bag = None
+    drawn = []
+    for _ in range(5):
+        record, bag = sampler.draw(bag, difficulty="easy")
+        drawn.append(record.word)
+
+    assert sorted(drawn) == [f"easy{i}" for i in range(5)]
+    assert bag["round"] == 5 and set(bag) == {"pool", "size", "key", "round"}
+
+    # The next draw starts a new pass with a fresh key
+    _, next_bag = sampler.draw(bag, difficulty="easy")
+    assert next_bag["round"] == 1
+
+
+def test_pool_or_size_change_starts_a_fresh_bag(sampler):
+    _, bag = sampler.draw(None, difficulty="easy")
+    _, bag = sampler.draw(bag, difficulty="easy")
+
+    _, hard_bag = sampler.draw(bag, difficulty="hard")
+    assert hard_bag["pool"] == "hard|*" and hard_bag["round"] == 1
+
+    _, resized_bag = sampler.draw({**bag, "size": 99}, difficulty="easy")
+    assert resized_bag["size"] == 5 and resized_bag["round"] == 1
+
+
+def test_bag_without_key_starts_a_fresh_bag(sampler):
+    old_bag = {"pool": "easy|*", "size": 5, "stride": 2, "offset": 1, "round": 3}
+
+    _, bag = sampler.draw(old_bag, difficulty="easy")
+
+    assert "key" in bag and "stride" not in bag and bag["round"] == 1
+
+
+def test_unknown_difficulty_falls_back_to_whole_corpus(sampler):
+    key, indices = sampler.pool(["impossible"], None)
+
+    assert key == "impossible|*"
+    assert list(indices) == list(range(8))
+
+
+def test_filters_combine(sampler):
+    _, indices = sampler.pool(["easy", "hard"], "society")
+
+    assert list(indices) == [5, 6, 7]
+
+
+@pytest.mark.parametrize(
+    ("difficulty", "category", "expected"),
+    [
+        ("easy", "animals", (["easy"], "animals")),
+        (["easy", 3, None, "hard"], None, (["easy", "hard"], None)),
+        ([1, 2], 7, (None, None)),
+        ({"level": "easy"}, ["animals"], (None, None)),
+        (3, "animals", (None, "animals")),
+    ],
+)
+def test_clean_filters_drops_bad_types(difficulty, category, expected):
+    assert _clean_filters(difficulty, category) == expected
+
+
+def test_malformed_room_filters_do_not_fail_the_draw(sampler):
+    record, bag = sampler.draw(None, difficulty=[1, 2], category={"x": 1})
+
+    assert bag["pool"] == "*|*"
+    assert record.word
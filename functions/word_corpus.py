@@ -0,0 +1,245 @@
+"""
+Compact binary word corpus for the Cloud Functions.
+
+`enhanced_words.json` carries a lot of extraction metadata that the game
+never reads at runtime. This module compiles it into a small binary file
+that the functions memory-map on cold start, decoding only the record
+that is actually drawn. Records decode to slim ``WordRecord`` objects;
+the rich extraction metadata sits in a separate section and is only
+parsed when a record's ``metadata`` is asked for.
+
+Layout (little-endian):
+- header: magic ``IMPW``, format version (u16), reserved (u16),
+  record count (u32), label table size (u32), string table size (u32)
+- index: one fixed-width entry per record: ``(offset u32, length u32,
+  metadata offset u32, metadata length u32, difficulty u8, category u8)``;
+  offsets are relative to the start of their table, difficulty and
+  category are positions in the label table
+- label table: UTF-8 difficulty/category labels joined with ``\\x1f``
+- string table: UTF-8 records, fields joined with ``\\x1f`` (word, then hints)
+- metadata table: one UTF-8 JSON object per record with the remaining
+  extraction fields (fuzzy_synonyms, hypernyms, collocations, variants, ...)
+
+Build step (run from the repository root):
+    python functions/word_corpus.py functions/enhanced_words.json functions/enhanced_words.bin
+
+The source may also be a JSON Lines export (``enhanced_words.jsonl``) from
+extract_word_data.py, which is streamed instead of parsed as one document.
+"""
+
+import json
+import mmap
+import struct
+import sys
+
+MAGIC = b"IMPW"
+FORMAT_VERSION = 3
+HEADER = struct.Struct("<4sHHIII")
+INDEX_ENTRY = struct.Struct("<IIIIBB")
+FIELD_SEPARATOR = "\x1f"
+DEFAULT_CATEGORY = "other"
+DEFAULT_DIFFICULTY = "medium"
+HOT_FIELDS = ("word", "hints", "category", "difficulty")
+
+
+class WordRecord:
+    """Slim word record for the game's hot path; rich metadata is loaded on demand"""
+
+    __slots__ = ("word", "hints", "category", "difficulty", "_corpus", "_index")
+
+    def __init__(
+        self,
+        word: str,
+        hints: list[str],
+        category: str,
+        difficulty: str,
+        corpus: "WordCorpus",
+        index: int,
+    ):
+        self.word = word
+        self.hints = hints
+        self.category = category
+        self.difficulty = difficulty
+        self._corpus = corpus
+        self._index = index
+
+    @property
+    def metadata(self) -> dict:
+        """Extraction metadata (fuzzy_synonyms, hypernyms, ...), read from the corpus"""
+        return self._corpus.metadata(self._index)
+
+    def __repr__(self) -> str:
+        return f"WordRecord({self.word!r}, difficulty={self.difficulty!r})"
+
+
+def iter_source_words(source_path: str):
+    """
+    Yield the word dicts of an enhanced word file
+
+    ``.jsonl`` files (header line, one word per line, footer line) are read
+    line by line, so only one word is held in memory at a time; other files
+    are parsed as a single JSON document.
+    """
+    if not source_path.endswith(".jsonl"):
+        with open(source_path, "r", encoding="utf-8") as f:
+            yield from json.load(f).get("words", [])
+        return
+
+    with open(source_path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if "word" in entry:
+                yield entry
+
+
+def compile_corpus(source_path: str, output_path: str) -> int:
+    """
+    Compile the enhanced word JSON into the binary corpus format
+
+    Parameters
+    ----------
+    source_path : str
+        Path to enhanced_words.json or enhanced_words.jsonl
+    output_path : str
+        Path of the binary corpus to write
+
+    Returns
+    -------
+    int
+        Number of records written
+    """
+    index = bytearray()
+    strings = bytearray()
+    metadata = bytearray()
+    labels = {}
+
+    def label_id(label: str) -> int:
+        if label not in labels:
+            if FIELD_SEPARATOR in label or len(labels) > 255:
+                raise ValueError(f"Cannot store label {label!r}")
+            labels[label] = len(labels)
+        return labels[label]
+
+    count = 0
+    for word_data in iter_source_words(source_path):
+        count += 1
+        fields = [word_data["word"], *word_data.get("hints", [])]
+        if any(FIELD_SEPARATOR in field for field in fields):
+            raise ValueError(f"Field separator found in word {word_data['word']!r}")
+
+        record = FIELD_SEPARATOR.join(fields).encode("utf-8")
+        rich = json.dumps(
+            {k: v for k, v in word_data.items() if k not in HOT_FIELDS},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        index += INDEX_ENTRY.pack(
+            len(strings),
+            len(record),
+            len(metadata),
+            len(rich),
+            label_id(word_data.get("difficulty", DEFAULT_DIFFICULTY)),
+            label_id(word_data.get("category", DEFAULT_CATEGORY)),
+        )
+        strings += record
+        metadata += rich
+
+    if not count:
+        raise ValueError(f"{source_path} contains no words")
+
+    label_table = FIELD_SEPARATOR.join(labels).encode("utf-8")
+
+    with open(output_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                0,
+                count,
+                len(label_table),
+                len(strings),
+            )
+        )
+        f.write(index)
+        f.write(label_table)
+        f.write(strings)
+        f.write(metadata)
+
+    return count
+
+
+class WordCorpus:
+    """Read-only, memory-mapped view over a compiled word corpus"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count, labels_size, strings_size = HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a word corpus file")
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has corpus format {version}, expected {FORMAT_VERSION}"
+            )
+
+        self._count = count
+        labels_start = HEADER.size + count * INDEX_ENTRY.size
+        self._strings_start = labels_start + labels_size
+        self._metadata_start = self._strings_start + strings_size
+        self.labels = (
+            self._mm[labels_start : self._strings_start]
+            .decode("utf-8")
+            .split(FIELD_SEPARATOR)
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, i: int) -> tuple:
+        if not 0 <= i < self._count:
+            raise IndexError(f"word index {i} out of range")
+        return INDEX_ENTRY.unpack_from(self._mm, HEADER.size + i * INDEX_ENTRY.size)
+
+    def __getitem__(self, i: int) -> WordRecord:
+        offset, length, _, _, difficulty, category = self._entry(i)
+        start = self._strings_start + offset
+        word, *hints = (
+            self._mm[start : start + length].decode("utf-8").split(FIELD_SEPARATOR)
+        )
+
+        return WordRecord(
+            word, hints, self.labels[category], self.labels[difficulty], self, i
+        )
+
+    def metadata(self, i: int) -> dict:
+        """Decode the extraction metadata of record i"""
+        _, _, offset, length, _, _ = self._entry(i)
+        start = self._metadata_start + offset
+        return json.loads(self._mm[start : start + length].decode("utf-8"))
+
+    def iter_labels(self):
+        """Yield ``(index, difficulty, category)`` per record without decoding records"""
+        index = memoryview(self._mm)[
+            HEADER.size : HEADER.size + self._count * INDEX_ENTRY.size
+        ]
+        try:
+            for i, (_, _, _, _, difficulty, category) in enumerate(
+                INDEX_ENTRY.iter_unpack(index)
+            ):
+                yield i, self.labels[difficulty], self.labels[category]
+        finally:
+            index.release()
+
+    def close(self):
+        self._mm.close()
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "enhanced_words.json"
+    output = sys.argv[2] if len(sys.argv) > 2 else "enhanced_words.bin"
+
+    count = compile_corpus(source, output)
+    print(f"✅ Compiled {count} words into {output}")
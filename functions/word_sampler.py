@@ -0,0 +1,162 @@
+"""
+Non-repeating word sampler for the Cloud Functions.
+
+Words are drawn from pools of corpus indices, precomputed per difficulty
+and per category from the corpus index (records are not decoded). Each
+room walks its pool in the order of a keyed Feistel permutation of
+``range(size)``: round ``n`` draws position ``permute(n)``, which visits every
+word exactly once before repeating, and a fresh random key reshuffles the
+next pass. A draw is O(1) and the only per-room state is the small
+``wordBag`` dict kept on the room document.
+"""
+
+import random
+from array import array
+
+from word_corpus import WordCorpus, WordRecord
+
+ANY = "*"
+
+
+class WordSampler:
+    """Draws words without repeats per room, optionally filtered by difficulty/category"""
+
+    def __init__(self, corpus: WordCorpus):
+        self.corpus = corpus
+        self.by_difficulty = {}
+        self.by_category = {}
+        for i, difficulty, category in corpus.iter_labels():
+            self.by_difficulty.setdefault(difficulty, array("I")).append(i)
+            self.by_category.setdefault(category, array("I")).append(i)
+
+        self._pools = {}
+
+    def pool(self, difficulties: list[str] | None, category: str | None) -> tuple:
+        """
+        Get the corpus indices matching the filters
+
+        Parameters
+        ----------
+        difficulties : list[str] | None
+            Allowed difficulty levels, None for any
+        category : str | None
+            Required category, None for any
+
+        Returns
+        -------
+        tuple
+            (pool key, sequence of corpus indices); falls back to the whole
+            corpus when nothing matches
+        """
+        key = f"{','.join(sorted(difficulties)) if difficulties else ANY}|{category or ANY}"
+        if key in self._pools:
+            return key, self._pools[key]
+
+        if not difficulties and not category:
+            indices = range(len(self.corpus))
+        else:
+            allowed = set(range(len(self.corpus)))
+            if difficulties:
+                allowed &= {
+                    i for d in difficulties for i in self.by_difficulty.get(d, ())
+                }
+            if category:
+                allowed &= set(self.by_category.get(category, ()))
+            indices = (
+                array("I", sorted(allowed)) if allowed else range(len(self.corpus))
+            )
+
+        self._pools[key] = indices
+        return key, indices
+
+    def draw(
+        self,
+        word_bag: dict | None,
+        difficulty: str | list[str] | None = None,
+        category: str | None = None,
+    ) -> tuple[WordRecord, dict]:
+        """
+        Draw the next word of a room's bag
+
+        Parameters
+        ----------
+        word_bag : dict | None
+            The room's current ``wordBag``, None for a fresh room
+        difficulty : str | list[str] | None
+            Difficulty level(s) to draw from
+        category : str | None
+            Category to draw from
+
+        Returns
+        -------
+        tuple[WordRecord, dict]
+            The word record and the updated ``wordBag`` to store on the room
+        """
+        difficulties, category = _clean_filters(difficulty, category)
+        key, indices = self.pool(difficulties, category)
+        size = len(indices)
+
+        # Start a new bag when the filters or corpus changed or the bag ran out
+        if (
+            not word_bag
+            or word_bag.get("pool") != key
+            or word_bag.get("size") != size
+            or "key" not in word_bag
+            or word_bag.get("round", 0) >= size
+        ):
+            word_bag = {
+                "pool": key,
+                "size": size,
+                "key": random.getrandbits(63),
+                "round": 0,
+            }
+
+        position = _permute(word_bag["round"], size, word_bag["key"])
+        word_data = self.corpus[indices[position]]
+
+        return word_data, {**word_bag, "round": word_bag["round"] + 1}
+
+
+def _clean_filters(difficulty, category) -> tuple[list[str] | None, str | None]:
+    """Drop malformed room filters (wrong types) instead of failing the deal"""
+    if isinstance(difficulty, str):
+        difficulties = [difficulty]
+    elif isinstance(difficulty, (list, tuple)):
+        difficulties = [d for d in difficulty if isinstance(d, str)] or None
+    else:
+        difficulties = None
+
+    return difficulties, category if isinstance(category, str) else None
+
+
+_MASK64 = (1 << 64) - 1
+FEISTEL_ROUNDS = 6
+
+
+def _mix(value: int, key: int, round_number: int) -> int:
+    """SplitMix64 finalizer of the half block, key and round number"""
+    z = (value + key + (round_number + 1) * 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _permute(i: int, size: int, key: int) -> int:
+    """
+    Map i to its position in a keyed pseudo-random permutation of range(size)
+
+    A balanced Feistel network permutes the smallest even-width power of two
+    covering ``size``; outputs past ``size`` are fed back in (cycle walking),
+    which restricts the permutation to ``range(size)``. The covering domain is
+    under four times ``size``, so only a few walks are expected.
+    """
+    bits = max(2, (size - 1).bit_length())
+    half = (bits + 1) // 2
+    mask = (1 << half) - 1
+    while True:
+        left, right = i >> half, i & mask
+        for round_number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ (_mix(right, key, round_number) & mask)
+        i = (left << half) | right
+        if i < size:
+            return i